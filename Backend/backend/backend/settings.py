@@ -72,6 +72,19 @@ DATABASES = {
     }
 }
 
+# Local benchmarks, tests and quick checks can run against a SQLite file
+# instead (`manage.py migrate` works on both backends).
+if os.environ.get('DJANGO_SQLITE_PATH'):
+    DATABASES = {
+        'default': {
+            'ENGINE': 'django.db.backends.sqlite3',
+            'NAME': os.environ['DJANGO_SQLITE_PATH'],
+        }
+    }
+
+# `manage.py test` skips the slow tests; run them with `manage.py test --tag slow`
+TEST_RUNNER = 'backend.test_runner.PortalTestRunner'
+
 # Password validation
 AUTH_PASSWORD_VALIDATORS = [
     {
@@ -106,6 +119,15 @@ STATICFILES_DIRS = [
 MEDIA_URL = '/media/'
 MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
 
+# Staff-only generated files (PDF exports); kept outside MEDIA_ROOT so they
+# are only reachable through the staff download views
+GENERATED_FILES_ROOT = os.path.join(BASE_DIR, 'generated')
+
+# Generated PDFs are cached here and evicted least-recently-used first once
+# the directory grows past PDF_CACHE_MAX_BYTES
+PDF_CACHE_ROOT = os.path.join(GENERATED_FILES_ROOT, 'cache')
+PDF_CACHE_MAX_BYTES = 2 * 1024 * 1024 * 1024  # 2GB
+
 # Default primary key field type
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
@@ -119,14 +141,46 @@ DATA_UPLOAD_MAX_MEMORY_SIZE = 10 * 1024 * 1024  # 1MB
 # Increase the maximum number of form fields
 DATA_UPLOAD_MAX_NUMBER_FIELDS = 10000  # or higher if needed
 
+# Worker processes rendering attendance rooms, for the merged PDF and the
+# per-room ZIP; 1 renders inside the request. Merging the rooms stays
+# serial, so check `manage.py benchmark_attendance_render --workers`.
+ATTENDANCE_RENDER_WORKERS = int(os.environ.get('ATTENDANCE_RENDER_WORKERS', os.cpu_count() or 1))
+
+# Bulk admit card PDFs are rendered in chunks by this many worker processes
+ADMIT_CARD_RENDER_WORKERS = int(os.environ.get('ADMIT_CARD_RENDER_WORKERS', os.cpu_count() or 1))
+
+# Rows per INSERT/COPY batch when importing an uploaded seat plan
+SEATPLAN_IMPORT_BATCH_SIZE = int(os.environ.get('SEATPLAN_IMPORT_BATCH_SIZE', 5000))
+
+# Subcategories numbered at once (one DB connection each) by "generate all rolls"
+ROLL_GENERATION_WORKERS = int(os.environ.get('ROLL_GENERATION_WORKERS', 4))
+
+# Applicant numbers: a keyed shuffle of a sequence, fixed width, taken from
+# the database a block at a time per process. Changing the key or width
+# later is safe but may cost an extra block query now and then.
+APPLICANT_NUMBER_DIGITS = int(os.environ.get('APPLICANT_NUMBER_DIGITS', 8))
+APPLICANT_NUMBER_KEY = os.environ.get('APPLICANT_NUMBER_KEY', SECRET_KEY)
+APPLICANT_NUMBER_BLOCK_SIZE = int(os.environ.get('APPLICANT_NUMBER_BLOCK_SIZE', 100))
+
 
 # REST Framework Settings
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': (
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        'portal.authentication.ClaimsJWTAuthentication',
     ),
 }
 
+# Read-only API requests authenticate from the access token's claims, without
+# loading auth_user; changes to a user reach reads when their token expires
+JWT_STATELESS_READS = os.environ.get('JWT_STATELESS_READS', '1') != '0'
+
+# Seconds browsers and the nginx cache may reuse public listings (posts,
+# subcategories) before revalidating them with their ETag
+PUBLIC_API_MAX_AGE = int(os.environ.get('PUBLIC_API_MAX_AGE', 60))
+
+# Circulars per page of the /api/posts/ listing (cursor paginated)
+POSTS_PAGE_SIZE = int(os.environ.get('POSTS_PAGE_SIZE', 20))
+
 # JWT Settings
 SIMPLE_JWT = {
     'ACCESS_TOKEN_LIFETIME': timedelta(minutes=30),
@@ -0,0 +1,13 @@
+from django.test.runner import DiscoverRunner
+
+
+class PortalTestRunner(DiscoverRunner):
+    """
+    DiscoverRunner that leaves out tests tagged "slow" (minutes-long memory
+    checks on large synthetic data) unless asked for with `--tag slow`.
+    """
+
+    def __init__(self, *args, tags=None, exclude_tags=None, **kwargs):
+        if 'slow' not in (tags or ()):
+            exclude_tags = {*(exclude_tags or ()), 'slow'}
+        super().__init__(*args, tags=tags, exclude_tags=exclude_tags, **kwargs)
@@ -2,7 +2,8 @@ from django.contrib import admin
 
 # Register your models here.
 from django.contrib import admin
-from .models import PortalPost, SubCategory,SeatPlan, SchoolApplicant
+from .models import PortalPost, SubCategory,SeatPlan, SchoolApplicant, BackgroundJob, PdfCacheEntry, RollSequence
+from .seating import assign_seats
 
 class SubCategoryInline(admin.TabularInline):
     model = SubCategory
@@ -21,6 +22,57 @@ admin.site.register(SchoolApplicant)
 
 @admin.register(SeatPlan)
 class SeatPlanAdmin(admin.ModelAdmin):
-    list_display = ('post_code', 'post_name', 'exam_center', 'building', 'floor', 'room_no', 'roll', 'exam_date_time')
+    list_display = ('post_code', 'post_name', 'exam_center', 'building', 'floor', 'room_no', 'roll', 'applicant', 'exam_date_time')
     search_fields = ('post_name', 'exam_center', 'roll')
-    list_filter = ('exam_center', 'building', 'floor')
\ No newline at end of file
+    list_filter = ('exam_center', 'building', 'floor')
+    list_select_related = ('applicant',)
+    readonly_fields = ('applicant',)
+
+    # Seat order decides who sits where, so any edit re-runs the assignment
+    # for the seat's post code (and its old one, when that changed)
+    def save_model(self, request, obj, form, change):
+        super().save_model(request, obj, form, change)
+        assign_seats([obj.post_code, form.initial.get('post_code')])
+
+    def delete_model(self, request, obj):
+        super().delete_model(request, obj)
+        assign_seats([obj.post_code])
+
+    def delete_queryset(self, request, queryset):
+        codes = set(queryset.values_list('post_code', flat=True))
+        super().delete_queryset(request, queryset)
+        assign_seats(codes)
+
+
+@admin.register(BackgroundJob)
+class BackgroundJobAdmin(admin.ModelAdmin):
+    list_display = ('id', 'kind', 'status', 'created_by', 'created_at', 'started_at', 'finished_at')
+    list_filter = ('kind', 'status')
+    readonly_fields = ('dedupe_key', 'result_file', 'result_name', 'error', 'created_at', 'started_at', 'finished_at')
+
+
+
+@admin.register(RollSequence)
+class RollSequenceAdmin(admin.ModelAdmin):
+    list_display = ('prefix', 'last_value', 'updated_at')
+    readonly_fields = ('updated_at',)
+
+
+@admin.register(PdfCacheEntry)
+class PdfCacheEntryAdmin(admin.ModelAdmin):
+    list_display = ('kind', 'params', 'size', 'hits', 'created_at', 'last_used_at')
+    list_filter = ('kind',)
+    readonly_fields = ('key', 'kind', 'params', 'file', 'size', 'hits', 'created_at', 'last_used_at')
+    actions = ['purge']
+
+    def has_add_permission(self, request):
+        return False
+
+    @admin.action(description="Purge selected cached PDFs")
+    def purge(self, request, queryset):
+        # Delete one by one so post_delete removes each file from disk
+        count = 0
+        for entry in queryset:
+            entry.delete()
+            count += 1
+        self.message_user(request, f"Purged {count} cached PDF(s).")
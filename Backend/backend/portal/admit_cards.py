@@ -0,0 +1,341 @@
+import csv
+import io
+import os
+import re
+import shutil
+import tempfile
+import zipfile
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+
+import django
+from django.conf import settings
+from reportlab.lib.pagesizes import A4
+from reportlab.lib.units import inch
+from reportlab.lib.utils import ImageReader
+from reportlab.pdfgen import canvas
+
+from .models import SchoolApplicant
+from .pdf_stream import PdfConcatenator, PdfReader
+from .serializers import with_seat_plan
+from .thumbnails import thumbnail_path
+
+
+# --- Layout constants (one card per A4 page) ---
+PAGE_SIZE = A4
+PAGE_W, PAGE_H = PAGE_SIZE
+
+MARGIN = 0.6 * inch
+CARD_W = PAGE_W - 2 * MARGIN
+CARD_TOP = PAGE_H - MARGIN
+CARD_H = 6.4 * inch
+
+PHOTO_W, PHOTO_H = 1.3 * inch, 1.6 * inch
+SIGNATURE_W, SIGNATURE_H = 1.6 * inch, 0.5 * inch
+PHOTO_X = PAGE_W - MARGIN - 0.25 * inch - PHOTO_W
+PHOTO_Y = CARD_TOP - 1.1 * inch - PHOTO_H
+SIGNATURE_X = PHOTO_X + (PHOTO_W - SIGNATURE_W) / 2
+SIGNATURE_Y = PHOTO_Y - 0.3 * inch - SIGNATURE_H
+
+LABEL_X = MARGIN + 0.25 * inch
+VALUE_X = LABEL_X + 1.6 * inch
+LINE_H = 0.3 * inch
+
+# Static parts of the page (frame, titles, field labels) are drawn once per
+# document as a form XObject and only referenced on every card.
+FRAME_FORM = 'admitCardFrame'
+
+APPLICANT_FIELDS = (
+    ("Name", 'student_name'),
+    ("Father's Name", 'father_name'),
+    ("Mother's Name", 'mother_name'),
+    ("Class", 'student_class'),
+    ("Gender", 'gender'),
+    ("Date of Birth", 'dob'),
+    ("Applicant No", 'applicant_number'),
+    ("Roll No", 'roll_number'),
+    ("Program", 'post_title'),
+    ("Subcategory", 'subcategory_name'),
+)
+SEAT_FIELDS = (
+    ("Exam Center", 'exam_center'),
+    ("Building", 'building'),
+    ("Floor", 'floor'),
+    ("Room", 'room_no'),
+    ("Exam Date & Time", 'exam_date_time'),
+)
+
+# Columns read per applicant; the seat comes joined in by with_seat_plan()
+CARD_COLUMNS = (
+    'applicant_number', 'roll_number', 'student_name', 'father_name', 'mother_name',
+    'gender', 'dob', 'student_class', 'photo', 'signature',
+    'subcategory__name', 'subcategory__post__title', 'seat_plan_data',
+)
+ITERATOR_CHUNK_SIZE = 2000
+
+# Cards handed to a worker process at a time
+CARDS_PER_CHUNK = 500
+
+MANIFEST_NAME = 'manifest.csv'
+MANIFEST_FIELDS = ('file', 'roll_number', 'applicant_number', 'student_name', 'exam_center', 'room_no', 'status')
+
+
+def admit_cards(subcategory_id):
+    """
+    Admit card data for every applicant of a subcategory that has a roll
+    number, in roll order, as plain dicts (so they can be sent to worker
+    processes). Streams through a server-side cursor.
+    """
+    rows = (with_seat_plan(SchoolApplicant.objects.filter(subcategory_id=subcategory_id))
+            .exclude(roll_number__isnull=True).exclude(roll_number='')
+            .order_by('roll_number', 'id')
+            .values(*CARD_COLUMNS)
+            .iterator(chunk_size=ITERATOR_CHUNK_SIZE))
+    for row in rows:
+        yield {
+            'applicant_number': row['applicant_number'],
+            'roll_number': row['roll_number'],
+            'student_name': row['student_name'],
+            'father_name': row['father_name'],
+            'mother_name': row['mother_name'],
+            'gender': row['gender'],
+            'dob': row['dob'].strftime('%d-%b-%Y') if row['dob'] else '',
+            'student_class': row['student_class'],
+            'photo': row['photo'] or None,
+            'signature': row['signature'] or None,
+            'subcategory_name': row['subcategory__name'],
+            'post_title': row['subcategory__post__title'],
+            'seat': row['seat_plan_data'],
+        }
+
+
+def card_filename(card):
+    label = re.sub(r'[^A-Za-z0-9.-]+', '-', f"{card['roll_number']}_{card['applicant_number']}").strip('-')
+    return f"admit_card_{label or 'NA'}.pdf"
+
+
+class AdmitCardDocument:
+    """
+    Draws admit cards, one per page, onto a reportlab canvas. `fileobj` can
+    be any writable binary file; the PDF is written on save().
+    """
+
+    def __init__(self, fileobj):
+        self.c = canvas.Canvas(fileobj, pagesize=PAGE_SIZE)
+        self.page_started = False
+        self._image_sizes = {}
+        self._define_frame()
+
+    def _define_frame(self):
+        c = self.c
+        c.beginForm(FRAME_FORM)
+        c.setLineWidth(1.2)
+        c.rect(MARGIN, CARD_TOP - CARD_H, CARD_W, CARD_H)
+        c.setFont("Helvetica-Bold", 20)
+        c.drawCentredString(PAGE_W / 2, CARD_TOP - 0.5 * inch, "ADMIT CARD")
+        c.setLineWidth(0.6)
+        c.line(MARGIN, CARD_TOP - 0.75 * inch, MARGIN + CARD_W, CARD_TOP - 0.75 * inch)
+
+        c.setFont("Helvetica-Bold", 11)
+        y = CARD_TOP - 1.2 * inch
+        for label, _ in APPLICANT_FIELDS:
+            c.drawString(LABEL_X, y, f"{label}:")
+            y -= LINE_H
+        y -= 0.15 * inch
+        c.setFont("Helvetica-Bold", 12)
+        c.drawString(LABEL_X, y, "Examination")
+        y -= LINE_H
+        c.setFont("Helvetica-Bold", 11)
+        for label, _ in SEAT_FIELDS:
+            c.drawString(LABEL_X, y, f"{label}:")
+            y -= LINE_H
+
+        c.rect(PHOTO_X, PHOTO_Y, PHOTO_W, PHOTO_H)
+        c.rect(SIGNATURE_X, SIGNATURE_Y, SIGNATURE_W, SIGNATURE_H)
+        c.setFont("Helvetica", 8)
+        c.drawCentredString(SIGNATURE_X + SIGNATURE_W / 2, SIGNATURE_Y - 0.15 * inch, "Applicant's signature")
+
+        c.setFont("Helvetica", 9)
+        c.drawString(LABEL_X, CARD_TOP - CARD_H + 0.3 * inch,
+                     "Bring this card to the exam hall. It is valid only with the photo above.")
+        c.endForm()
+
+    def draw_image(self, name, kind, x, y, w, h):
+        p = thumbnail_path(name, kind)
+        if not p:
+            return
+        try:
+            if p not in self._image_sizes:
+                self._image_sizes[p] = ImageReader(p).getSize()
+            iw, ih = self._image_sizes[p]
+            if iw <= 0 or ih <= 0:
+                return
+            scale = min((w - 4) / iw, (h - 4) / ih)
+            dw, dh = iw * scale, ih * scale
+            self.c.drawImage(p, x + (w - dw) / 2, y + (h - dh) / 2, width=dw, height=dh, mask='auto')
+        except Exception:
+            pass  # leave the box empty if the image cannot be read
+
+    def draw_card(self, card):
+        c = self.c
+        if self.page_started:
+            c.showPage()
+        self.page_started = True
+        c.doForm(FRAME_FORM)
+
+        c.setFont("Helvetica", 11)
+        y = CARD_TOP - 1.2 * inch
+        for _, key in APPLICANT_FIELDS:
+            c.drawString(VALUE_X, y, str(card.get(key) or ''))
+            y -= LINE_H
+        y -= 0.15 * inch + LINE_H
+        seat = card.get('seat')
+        if not seat:
+            c.drawString(VALUE_X, y, "Not assigned yet")
+        else:
+            for _, key in SEAT_FIELDS:
+                c.drawString(VALUE_X, y, str(seat.get(key) or ''))
+                y -= LINE_H
+
+        self.draw_image(card.get('photo'), 'admit_photo', PHOTO_X, PHOTO_Y, PHOTO_W, PHOTO_H)
+        self.draw_image(card.get('signature'), 'signature', SIGNATURE_X, SIGNATURE_Y, SIGNATURE_W, SIGNATURE_H)
+
+    def save(self):
+        if not self.page_started:
+            # An empty document still needs a page to be a valid PDF
+            self.c.showPage()
+        self.c.save()
+
+
+def render_cards(cards, path):
+    """Render a chunk of cards to one PDF (runs in a worker process); returns (path, count)."""
+    doc = AdmitCardDocument(path)
+    for card in cards:
+        doc.draw_card(card)
+    doc.save()
+    return path, len(cards)
+
+
+def render_card_files(cards):
+    """Render each card of a chunk to its own PDF; returns (card, bytes or exception)."""
+    out = []
+    for card in cards:
+        buf = io.BytesIO()
+        try:
+            doc = AdmitCardDocument(buf)
+            doc.draw_card(card)
+            doc.save()
+        except Exception as e:
+            out.append((card, e))
+        else:
+            out.append((card, buf.getvalue()))
+    return out
+
+
+def _chunks(cards, size=CARDS_PER_CHUNK):
+    cards = iter(cards)
+    while True:
+        chunk = list(islice(cards, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def _map_ordered(func, calls, workers):
+    """
+    Yield func(*args) for every args tuple in `calls`, in order. With more
+    than one worker the calls run in a process pool with a bounded number
+    in flight, so memory does not grow with the number of cards.
+    """
+    if workers <= 1:
+        for args in calls:
+            yield func(*args)
+        return
+    pending = deque()
+    with ProcessPoolExecutor(max_workers=workers, initializer=django.setup) as pool:
+        for args in calls:
+            pending.append(pool.submit(func, *args))
+            while len(pending) > workers * 2:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
+
+
+def render_admit_cards_pdf(cards, fileobj, workers=None, progress=None):
+    """
+    Write one PDF with a page per card to `fileobj`, keeping card order.
+    Chunks of cards are rendered to temporary files (in a process pool with
+    more than one worker) and their pages appended to `fileobj` as each one
+    finishes, so memory is bounded by a chunk rather than by the document.
+    `progress(done)` is called with the number of cards rendered so far.
+    Returns the number of cards.
+    """
+    if workers is None:
+        workers = getattr(settings, 'ADMIT_CARD_RENDER_WORKERS', 1)
+    chunks = _chunks(cards)
+    if PdfReader is None:
+        # Without pypdf chunks cannot be joined: one canvas for every card
+        doc = AdmitCardDocument(fileobj)
+        done = 0
+        for chunk in chunks:
+            for card in chunk:
+                doc.draw_card(card)
+            done += len(chunk)
+            if progress:
+                progress(done)
+        doc.save()
+        return done
+
+    workdir = tempfile.mkdtemp(prefix='admit_cards_', dir=settings.FILE_UPLOAD_TEMP_DIR)
+    try:
+        calls = ((chunk, os.path.join(workdir, f"cards_{n:06d}.pdf")) for n, chunk in enumerate(chunks))
+        pdf = PdfConcatenator(fileobj)
+        done = 0
+        for path, count in _map_ordered(render_cards, calls, workers):
+            pdf.add(path)
+            os.remove(path)
+            done += count
+            if progress:
+                progress(done)
+        if not done:
+            # An empty document still needs a page to be a valid PDF
+            empty = io.BytesIO()
+            AdmitCardDocument(empty).save()
+            pdf.add(empty)
+        pdf.close()
+        return done
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+def write_admit_cards_zip(cards, fileobj, workers=None, progress=None):
+    """
+    Write a ZIP with one PDF per card plus a CSV manifest to `fileobj`. A
+    card that fails to render is left out and marked in the manifest.
+    Returns the number of cards.
+    """
+    if workers is None:
+        workers = getattr(settings, 'ADMIT_CARD_RENDER_WORKERS', 1)
+    manifest = io.StringIO()
+    writer = csv.writer(manifest)
+    writer.writerow(MANIFEST_FIELDS)
+    done = 0
+    with zipfile.ZipFile(fileobj, 'w') as archive:
+        for results in _map_ordered(render_card_files, ((chunk,) for chunk in _chunks(cards)), workers):
+            for card, pdf in results:
+                name = card_filename(card)
+                if isinstance(pdf, Exception):
+                    status = f"failed: {pdf}"
+                else:
+                    # PDF content is already compressed; storing it saves CPU
+                    archive.writestr(name, pdf, compress_type=zipfile.ZIP_STORED)
+                    status = 'ok'
+                seat = card.get('seat') or {}
+                writer.writerow([name, card['roll_number'], card['applicant_number'], card['student_name'],
+                                 seat.get('exam_center', ''), seat.get('room_no', ''), status])
+            done += len(results)
+            if progress:
+                progress(done)
+        archive.writestr(MANIFEST_NAME, manifest.getvalue(), compress_type=zipfile.ZIP_DEFLATED)
+    return done
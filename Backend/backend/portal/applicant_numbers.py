@@ -0,0 +1,137 @@
+import hashlib
+import hmac
+import os
+import threading
+
+from django.conf import settings
+from django.db import connection, transaction
+
+from .models import NumberSequence, SchoolApplicant
+
+
+# Created by migration 0020 on PostgreSQL. nextval() never hands a value out
+# twice, even when the transaction that took it rolls back.
+DB_SEQUENCE = 'portal_applicant_number_seq'
+
+FEISTEL_ROUNDS = 8
+
+
+class ApplicantNumbersExhausted(Exception):
+    """Every number of the configured width has been handed out."""
+
+
+class FeistelPermutation:
+    """
+    A keyed shuffle of 0 .. 10**digits - 1 onto itself (format-preserving):
+    the digits are split into two halves, and each round adds an HMAC of one
+    half to the other, modulo that half's size. Every round can be undone,
+    so distinct inputs always give distinct outputs.
+    """
+
+    def __init__(self, digits, key, rounds=FEISTEL_ROUNDS):
+        self.size = 10 ** digits
+        self.left_mod = 10 ** (digits // 2)
+        self.right_mod = 10 ** (digits - digits // 2)
+        self.key = key.encode() if isinstance(key, str) else key
+        self.rounds = rounds
+
+    def _f(self, round_no, value):
+        digest = hmac.new(self.key, f"{round_no}:{value}".encode(), hashlib.sha256).digest()
+        return int.from_bytes(digest[:8], 'big')
+
+    def __call__(self, n):
+        left, right = divmod(n, self.right_mod)
+        for r in range(self.rounds):
+            if r % 2 == 0:
+                left = (left + self._f(r, right)) % self.left_mod
+            else:
+                right = (right + self._f(r, left)) % self.right_mod
+        return left * self.right_mod + right
+
+
+class ApplicantNumberAllocator:
+    """
+    Hands out non-guessable, never-repeating applicant numbers without a
+    lookup per number. Sequence values are taken from the database a block
+    at a time, kept per process, and shuffled by a FeistelPermutation. The
+    only query per block filters out numbers that are already in use (legacy
+    random numbers, or numbers issued under a different key). Without a
+    database sequence, blocks are only cached when taken outside a
+    transaction; inside one a single value is taken per number.
+    """
+
+    def __init__(self, digits, key, block_size, sequence_name='applicant_number', db_sequence=None):
+        self.digits = digits
+        self.permute = FeistelPermutation(digits, key)
+        self.block_size = max(1, block_size)
+        self.sequence_name = sequence_name
+        self.db_sequence = db_sequence
+        self._lock = threading.Lock()
+        self._pid = None
+        self._numbers = []
+
+    def _take_values(self, count):
+        if self.db_sequence and connection.vendor == 'postgresql':
+            with connection.cursor() as cursor:
+                cursor.execute("SELECT nextval(%s) FROM generate_series(1, %s)", [self.db_sequence, count])
+                return [row[0] for row in cursor.fetchall()]
+        with transaction.atomic():
+            seq, _ = NumberSequence.objects.select_for_update().get_or_create(name=self.sequence_name)
+            start = seq.last_value
+            seq.last_value = start + count
+            seq.save(update_fields=['last_value'])
+        return list(range(start + 1, start + count + 1))
+
+    def _refill_size(self):
+        if self.db_sequence and connection.vendor == 'postgresql':
+            return self.block_size
+        if connection.in_atomic_block:
+            # The counter update would be rolled back with the caller's
+            # transaction while a cached block survived it, and the block's
+            # values would be handed out again. Take only the value needed,
+            # so it rolls back together with the row that uses it.
+            return 1
+        return self.block_size
+
+    def _refill(self):
+        while True:
+            values = [v for v in self._take_values(self._refill_size()) if v < self.permute.size]
+            if not values:
+                raise ApplicantNumbersExhausted(f"All {self.permute.size} {self.digits}-digit numbers are used.")
+            numbers = [str(self.permute(v)).zfill(self.digits) for v in values]
+            taken = set(SchoolApplicant.objects.filter(applicant_number__in=numbers)
+                        .values_list('applicant_number', flat=True))
+            fresh = [n for n in numbers if n not in taken]
+            if fresh:
+                # Hand out in sequence order; pop() takes from the end
+                self._numbers = fresh[::-1]
+                return
+
+    def next(self):
+        with self._lock:
+            if self._pid != os.getpid():
+                # A forked worker must not reuse the parent's block
+                self._pid = os.getpid()
+                self._numbers = []
+            if not self._numbers:
+                self._refill()
+            return self._numbers.pop()
+
+
+_allocator = None
+_allocator_lock = threading.Lock()
+
+
+def next_applicant_number():
+    """The next applicant number, from the process-wide allocator."""
+    global _allocator
+    if _allocator is None:
+        with _allocator_lock:
+            if _allocator is None:
+                _allocator = ApplicantNumberAllocator(
+                    settings.APPLICANT_NUMBER_DIGITS,
+                    settings.APPLICANT_NUMBER_KEY,
+                    settings.APPLICANT_NUMBER_BLOCK_SIZE,
+                    db_sequence=DB_SEQUENCE,
+                )
+    return _allocator.next()
@@ -0,0 +1,544 @@
+import csv
+import io
+import os
+import re
+import shutil
+import tempfile
+import zipfile
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from itertools import chain, groupby
+
+import django
+from django.conf import settings
+from django.db.models import F
+from django.utils.timezone import localdate
+from reportlab.lib.pagesizes import landscape, A3
+from reportlab.lib.units import inch
+from reportlab.lib.utils import ImageReader
+from reportlab.pdfgen import canvas
+
+from .models import SeatPlan, SubCategory
+from .pdf_stream import PdfConcatenator, PdfReader
+from .thumbnails import thumbnail_path
+
+
+# --- Layout constants ---
+PAGE_SIZE = landscape(A3)
+PAGE_W, PAGE_H = PAGE_SIZE
+
+LM, RM = 0.35 * inch, 0.35 * inch
+TM, BM = 0.60 * inch, 0.60 * inch
+CELL_PAD = 4
+
+CONTENT_W = PAGE_W - LM - RM
+HEADER_H = 1.8 * inch  # Increased for roll range
+
+ROW_H = 1.05 * inch
+IMAGE_TARGET_H = ROW_H - 0.30 * inch
+
+# Compute rows per page once
+ROWS_PER_PAGE = max(1, int((PAGE_H - TM - BM - HEADER_H) // ROW_H))
+
+# Fixed columns: S.No, Post, Roll No, Name, Photo, Signature, Present
+COLS = [
+    {"label": "S.No", "key": "serial", "weight": 0.7},
+    {"label": "Post", "key": "post", "weight": 3.0},
+    {"label": "Roll No", "key": "roll", "weight": 1.6},
+    {"label": "Name", "key": "name", "weight": 3.2},
+    {"label": "Photo", "key": "photo", "weight": 1.4},
+    {"label": "Signature", "key": "signature", "weight": 1.4},
+    {"label": "Present", "key": "present", "weight": 0.9},
+]
+_total_w = sum(col["weight"] for col in COLS)
+for _col in COLS:
+    _col["width"] = CONTENT_W * (_col["weight"] / max(_total_w, 1e-6))
+
+# Form XObject names for the static page parts; rows alternate by serial
+HEADER_FORM = 'colHeader'
+ROW_FORMS = ('rowStriped', 'rowPlain')
+
+
+# Columns the attendance export reads; everything else (addresses, reason...)
+# stays in the database.
+SEAT_COLUMNS = (
+    'exam_center', 'building', 'floor', 'room_no', 'post_code', 'post_name', 'exam_date_time',
+    'applicant__subcategory_id', 'applicant__roll_number', 'applicant__student_name',
+)
+ITERATOR_CHUNK_SIZE = 2000
+
+
+def sheet_date():
+    """The date printed on attendance sheets, so also part of their cache keys."""
+    return localdate()
+
+
+def attendance_filters(params):
+    """
+    Normalize the attendance query parameters (post_code, subcategory_id,
+    center, custom_center) into the filters the export actually uses.
+    A center of 'custom' means "use custom_center instead".
+    """
+    center = (params.get('center') or '').strip()
+    custom_center = (params.get('custom_center') or '').strip()
+    selected_center = ''
+    if center and center != 'custom':
+        selected_center = center
+    elif center == 'custom' and custom_center:
+        selected_center = custom_center
+    return {
+        'post_code': (params.get('post_code') or '').strip(),
+        'subcategory_id': (params.get('subcategory_id') or '').strip(),
+        'center': selected_center,
+    }
+
+
+def attendance_rooms(filters):
+    """
+    Rooms to draw for normalized `filters`, or None when no SeatPlan row
+    matches them.
+    """
+    # 1) SeatPlan rows with filters
+    seat_plans = SeatPlan.objects.all()
+    if filters['post_code']:
+        seat_plans = seat_plans.filter(post_code__iexact=filters['post_code'])
+    if filters['center']:
+        seat_plans = seat_plans.filter(exam_center__icontains=filters['center'])
+
+    # If a specific subcategory is provided, only show its applicants
+    subcategory_id = None
+    if filters['subcategory_id'].isdigit() and SubCategory.objects.filter(id=int(filters['subcategory_id'])).exists():
+        subcategory_id = int(filters['subcategory_id'])
+
+    # Only fetch the columns that are drawn, and stream the rows through a
+    # server-side cursor so memory is bounded by the largest room rather
+    # than by the whole seat plan.
+    seat_plans = (seat_plans
+                  .select_related('applicant')
+                  .only(*SEAT_COLUMNS)
+                  # The stored file names, without FieldFiles: each of those
+                  # points back at its instance, a cycle only the gc frees
+                  .annotate(photo_name=F('applicant__photo'), signature_name=F('applicant__signature'))
+                  .order_by('exam_center', 'building', 'floor', 'room_no', 'id')
+                  .iterator(chunk_size=ITERATOR_CHUNK_SIZE))
+
+    rooms = iter_rooms(seat_plans, subcategory_id)
+    first = next(rooms, None)
+    if first is None:
+        return None
+    return chain([first], rooms)
+
+
+def _room_key(seat):
+    return (seat.exam_center, seat.building, seat.floor, seat.room_no)
+
+
+def iter_rooms(seat_plans, subcategory_id=None):
+    """
+    Walk ordered SeatPlan rows (with their assigned applicant joined in) room
+    by room. Yields one dict per room with the header labels, the roll range
+    and the rows to draw. Rooms only hold plain values so they can be handed
+    to a worker process.
+    """
+    for (center, bldg, flr, room), group in groupby(seat_plans, key=_room_key):
+        seats = []
+        rows = []
+        rolls = []
+        for seat_row in group:
+            applicant = seat_row.applicant
+            if applicant is not None and subcategory_id is not None and applicant.subcategory_id != subcategory_id:
+                applicant = None
+            if applicant is not None and applicant.roll_number:
+                rolls.append(applicant.roll_number)
+            seats.append(seat_row)
+            rows.append({
+                "post": seat_row.post_name or seat_row.post_code or '',
+                "roll": (applicant.roll_number or '') if applicant else '',
+                "name": applicant.student_name if applicant else '',
+                "photo": (seat_row.photo_name or None) if applicant else None,
+                "signature": (seat_row.signature_name or None) if applicant else None,
+            })
+
+        # Determine labels for header (handle multiple posts in room)
+        post_names = list({(s.post_name or '').strip() for s in seats if (s.post_name or '').strip()})
+        codes = list({(s.post_code or '').strip() for s in seats if (s.post_code or '').strip()})
+
+        rolls.sort()
+        if rolls:
+            roll_range = f"{rolls[0]} to {rolls[-1]}"
+        else:
+            roll_range = "No rolls assigned"
+
+        yield {
+            "center": center,
+            "building": bldg,
+            "floor": flr,
+            "room": room,
+            "post_label": post_names[0] if len(post_names) == 1 else 'Multiple',
+            "code_label": codes[0] if len(codes) == 1 else 'Multiple',
+            "exam_time": seats[0].exam_date_time if seats else '',
+            "roll_range": roll_range,
+            "first_roll": rolls[0] if rolls else '',
+            "last_roll": rolls[-1] if rolls else '',
+            "rows": rows,
+        }
+
+
+class AttendanceSheet:
+    """
+    Draws room-wise attendance pages onto one reportlab canvas.
+    `fileobj` can be any writable binary file; the PDF is written on save().
+    """
+
+    def __init__(self, fileobj, use_forms=True):
+        self.c = canvas.Canvas(fileobj, pagesize=PAGE_SIZE)
+        self.page_started = False
+        self._image_sizes = {}
+        # With forms the column header strip and the empty row grid are
+        # written once per document and every page only references them.
+        self.use_forms = use_forms
+        if use_forms:
+            self._define_forms()
+
+    def _define_forms(self):
+        c = self.c
+        # Form content is drawn with y relative to the placement point, so the
+        # bounding boxes must reach below zero for the header strip.
+        c.beginForm(HEADER_FORM, lowerx=0, lowery=-inch, upperx=PAGE_W, uppery=inch)
+        self._draw_column_header(0)
+        c.endForm()
+        for name, striped in ((ROW_FORMS[0], True), (ROW_FORMS[1], False)):
+            c.beginForm(name, lowerx=0, lowery=0, upperx=PAGE_W, uppery=ROW_H)
+            self._draw_row_grid(0, striped)
+            c.endForm()
+
+    def _place_form(self, name, y):
+        c = self.c
+        c.saveState()
+        c.translate(0, y)
+        c.doForm(name)
+        c.restoreState()
+
+    def _draw_column_header(self, y):
+        c = self.c
+        c.setFont("Helvetica-Bold", 11)
+        c.setFillColorRGB(0, 0, 0)
+        x = LM
+        for col in COLS:
+            c.rect(x, y - 0.24 * inch, col["width"], 0.38 * inch, fill=1, stroke=0)
+            c.setFillColorRGB(1, 1, 1)
+            c.drawCentredString(x + col["width"] / 2, y - 0.07 * inch, col["label"])
+            c.setFillColorRGB(0, 0, 0)
+            x += col["width"]
+
+    def _draw_row_grid(self, y_bottom, striped):
+        """Zebra stripe, cell borders and the empty checkbox of one row."""
+        c = self.c
+        if striped:
+            c.setFillColorRGB(0.965, 0.965, 0.965)
+            c.rect(LM, y_bottom, CONTENT_W, ROW_H, fill=1, stroke=0)
+            c.setFillColorRGB(0, 0, 0)
+        x = LM
+        for col in COLS:
+            if col["key"] == 'present':
+                self.draw_checkbox_cell(x, y_bottom, col["width"], ROW_H)
+            else:
+                c.rect(x, y_bottom, col["width"], ROW_H)
+            x += col["width"]
+
+    def draw_header(self, room):
+        c = self.c
+        y = PAGE_H - TM
+        c.setFont("Helvetica-Bold", 13)
+        c.drawString(LM, y, f"Center: {room['center'] or 'N/A'}")
+        c.setFont("Helvetica", 11)
+        c.drawRightString(PAGE_W - RM, y, f"Building: {room['building'] or 'N/A'} | Floor: {room['floor'] or 'N/A'} | Room: {room['room'] or 'N/A'}")
+
+        y -= 0.32 * inch
+        c.setFont("Helvetica-Bold", 12)
+        c.drawString(LM, y, f"Post: {room['post_label']}")
+        c.setFont("Helvetica", 11)
+        c.drawRightString(PAGE_W - RM, y, f"Code: {room['code_label']} | Exam: {room['exam_time'] or 'N/A'}")
+
+        # Add roll range information
+        y -= 0.28 * inch
+        c.setFont("Helvetica-Bold", 11)
+        c.drawCentredString(PAGE_W / 2, y, f"Roll Range: {room['roll_range']}")
+
+        y -= 0.32 * inch
+        c.setFont("Helvetica-Bold", 16)
+        c.drawCentredString(PAGE_W / 2, y, "ATTENDANCE SHEET")
+
+        y -= 0.28 * inch
+        c.setFont("Helvetica", 11)
+        c.drawString(LM, y, "Date: " + sheet_date().strftime("%d-%b-%Y"))
+
+        y -= 0.36 * inch
+        if self.use_forms:
+            self._place_form(HEADER_FORM, y)
+        else:
+            self._draw_column_header(y)
+        return y - 0.45 * inch
+
+    def draw_image_cell(self, name, kind, x, y_bottom, w, h_row):
+        c = self.c
+        inner_x = x + 2
+        inner_w, inner_h = w - 4, h_row - 4
+        p = thumbnail_path(name, kind)
+        if p:
+            try:
+                if p not in self._image_sizes:
+                    self._image_sizes[p] = ImageReader(p).getSize()
+                iw, ih = self._image_sizes[p]
+                if ih > 0:
+                    target_h = min(IMAGE_TARGET_H, inner_h)
+                    scale = target_h / ih
+                    draw_w = min(inner_w, iw * scale)
+                    draw_h = min(inner_h, ih * scale)
+                    dx = inner_x + (inner_w - draw_w) / 2
+                    dy = y_bottom + (h_row - draw_h) / 2
+                    c.drawImage(p, dx, dy, width=draw_w, height=draw_h, preserveAspectRatio=True, mask='auto')
+                    return
+            except Exception:
+                pass
+        # leave blank if no image
+
+    def draw_checkbox_cell(self, x, y_bottom, w, h_row):
+        c = self.c
+        c.rect(x, y_bottom, w, h_row)
+        side = min(0.38 * inch, w - 6, h_row - 6)
+        bx, by = x + (w - side) / 2, y_bottom + (h_row - side) / 2
+        c.rect(bx, by, side, side)
+        c.setFillColorRGB(0.95, 0.95, 0.95)
+        c.rect(bx + 1, by + 1, side - 2, side - 2, fill=1, stroke=0)
+        c.setFillColorRGB(0, 0, 0)
+
+    def draw_text_cell(self, text, x, y_bottom, w, h_row, font="Helvetica", size=10, align="left", pad=CELL_PAD):
+        c = self.c
+        c.setFont(font, size)
+        s = "" if text is None else str(text)
+        if align == "center":
+            c.drawCentredString(x + w / 2, y_bottom + h_row / 2 - size / 2, s)
+        elif align == "right":
+            c.drawRightString(x + w - pad, y_bottom + h_row / 2 - size / 2, s)
+        else:
+            c.drawString(x + pad, y_bottom + h_row / 2 - size / 2, s)
+
+    def draw_row(self, i, row, y_bottom):
+        row_h = ROW_H
+        if self.use_forms:
+            self._place_form(ROW_FORMS[i % 2], y_bottom)
+        else:
+            self._draw_row_grid(y_bottom, i % 2 == 0)
+
+        x = LM
+        for col in COLS:
+            key = col["key"]
+            w = col["width"]
+            if key == 'serial':
+                self.draw_text_cell(i, x, y_bottom, w, row_h, align="center")
+            elif key == 'post':
+                self.draw_text_cell(row["post"], x, y_bottom, w, row_h)
+            elif key == 'roll':
+                self.draw_text_cell(row["roll"], x, y_bottom, w, row_h, align="center")
+            elif key == 'name':
+                self.draw_text_cell(row["name"], x, y_bottom, w, row_h)
+            elif key == 'photo':
+                self.draw_image_cell(row["photo"], 'photo', x, y_bottom, w, row_h)
+            elif key == 'signature':
+                self.draw_image_cell(row["signature"], 'signature', x, y_bottom, w, row_h)
+            x += w
+        return row_h
+
+    def draw_footer(self, page_no):
+        self.c.setFont("Helvetica", 9)
+        self.c.drawCentredString(PAGE_W / 2, 0.5 * inch, f"Page {page_no}")
+
+    def draw_room(self, room):
+        c = self.c
+        if self.page_started:
+            c.showPage()
+        self.page_started = True
+        room_page = 1
+        y = self.draw_header(room)
+
+        used = 0
+        serial = 0
+        for row in room["rows"]:
+            if used >= ROWS_PER_PAGE:
+                self.draw_footer(room_page)
+                c.showPage()
+                room_page += 1
+                y = self.draw_header(room)
+                used = 0
+            serial += 1
+            row_h = self.draw_row(serial, row, y - ROW_H)
+            y -= row_h
+            used += 1
+        # Footer for the last page of this room
+        self.draw_footer(room_page)
+
+    def save(self):
+        self.c.save()
+
+
+def render_room(room, path, use_forms=True):
+    """Render a single room to its own PDF (runs in a worker process)."""
+    sheet = AttendanceSheet(path, use_forms=use_forms)
+    sheet.draw_room(room)
+    sheet.save()
+    return path
+
+
+def _collect_room(room, future):
+    try:
+        path = future.result()
+        with open(path, 'rb') as fh:
+            data = fh.read()
+        os.remove(path)
+        return room, data
+    except Exception as e:
+        return room, e
+
+
+def iter_room_pdfs(rooms, workers=None, use_forms=True):
+    """
+    Render every room to its own PDF and yield (room, pdf_bytes) in room
+    order. With more than one worker the rooms are rendered in a process pool
+    with only a bounded number in flight. A room that fails to render yields
+    its exception instead of bytes, so the caller decides whether one bad
+    room should stop the whole export.
+    """
+    if workers is None:
+        workers = getattr(settings, 'ATTENDANCE_RENDER_WORKERS', 1)
+    if workers <= 1:
+        for room in rooms:
+            buf = io.BytesIO()
+            try:
+                render_room(room, buf, use_forms)
+            except Exception as e:
+                yield room, e
+            else:
+                yield room, buf.getvalue()
+        return
+
+    workdir = tempfile.mkdtemp(prefix='attendance_', dir=settings.FILE_UPLOAD_TEMP_DIR)
+    try:
+        pending = deque()
+        with ProcessPoolExecutor(max_workers=workers, initializer=django.setup) as pool:
+            for n, room in enumerate(rooms):
+                path = os.path.join(workdir, f"room_{n:06d}.pdf")
+                pending.append((room, pool.submit(render_room, room, path, use_forms)))
+                while len(pending) > workers * 2:
+                    yield _collect_room(*pending.popleft())
+            while pending:
+                yield _collect_room(*pending.popleft())
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+class _ChunkStream:
+    """
+    Write-only file object whose contents so far can be drained and sent
+    on. It has no tell()/seek(), so zipfile writes data descriptors instead
+    of seeking back.
+    """
+
+    def __init__(self):
+        self.chunks = []
+
+    def write(self, data):
+        self.chunks.append(bytes(data))
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def drain(self):
+        data = b''.join(self.chunks)
+        self.chunks = []
+        return data
+
+
+def iter_attendance(rooms, workers=None, use_forms=True):
+    """
+    Yield the attendance PDF for `rooms` in chunks, keeping room order: the
+    pages of each room as soon as it is rendered (in a process pool with
+    more than one worker), then the page tree and trailer. A PdfConcatenator
+    appends every room on its own, so memory is bounded by the largest room
+    rather than by the document, and a response can start with the first
+    room. Page footers, serials and roll ranges are per room, so the result
+    matches what a single canvas draws. Without pypdf everything goes onto
+    one canvas, which keeps the whole document in memory and yields once.
+    """
+    if PdfReader is None:
+        buf = io.BytesIO()
+        sheet = AttendanceSheet(buf, use_forms=use_forms)
+        for room in rooms:
+            sheet.draw_room(room)
+        sheet.save()
+        yield buf.getvalue()
+        return
+
+    stream = _ChunkStream()
+    pdf = PdfConcatenator(stream)
+    for room, data in iter_room_pdfs(rooms, workers, use_forms):
+        if isinstance(data, Exception):
+            raise data
+        pdf.add(io.BytesIO(data))
+        yield stream.drain()
+    pdf.close()
+    yield stream.drain()
+
+
+def render_attendance(rooms, fileobj, workers=None, use_forms=True):
+    """Write the attendance PDF for `rooms` to `fileobj` (see iter_attendance)."""
+    for chunk in iter_attendance(rooms, workers, use_forms):
+        fileobj.write(chunk)
+
+
+# --- Per-room ZIP export ---
+
+MANIFEST_NAME = 'manifest.csv'
+MANIFEST_FIELDS = (
+    'file', 'center', 'building', 'floor', 'room', 'post', 'code', 'exam_time',
+    'seats', 'first_roll', 'last_roll', 'roll_range', 'status',
+)
+
+
+def room_filename(n, room):
+    parts = [room['center'], room['building'], room['floor'], room['room']]
+    label = '_'.join(re.sub(r'[^A-Za-z0-9.-]+', '-', str(p or 'NA')).strip('-') or 'NA' for p in parts)
+    return f"{n:04d}_{label}.pdf"
+
+
+def attendance_zip(rooms, workers=None):
+    """
+    Yield a ZIP archive with one attendance PDF per room, chunk by chunk as
+    rooms finish rendering, followed by a CSV manifest of the rooms and their
+    roll ranges. A room that fails to render is left out of the archive and
+    marked in the manifest instead of failing the whole download.
+    """
+    stream = _ChunkStream()
+    manifest = io.StringIO()
+    writer = csv.writer(manifest)
+    writer.writerow(MANIFEST_FIELDS)
+    with zipfile.ZipFile(stream, 'w') as archive:
+        for n, (room, pdf) in enumerate(iter_room_pdfs(rooms, workers), start=1):
+            name = room_filename(n, room)
+            if isinstance(pdf, Exception):
+                status = f"failed: {pdf}"
+            else:
+                # PDF content is already compressed; storing it saves CPU
+                archive.writestr(name, pdf, compress_type=zipfile.ZIP_STORED)
+                status = 'ok'
+            writer.writerow([
+                name, room['center'], room['building'], room['floor'], room['room'],
+                room['post_label'], room['code_label'], room['exam_time'], len(room['rows']),
+                room['first_roll'], room['last_roll'], room['roll_range'], status,
+            ])
+            chunk = stream.drain()
+            if chunk:
+                yield chunk
+        archive.writestr(MANIFEST_NAME, manifest.getvalue(), compress_type=zipfile.ZIP_DEFLATED)
+    yield stream.drain()
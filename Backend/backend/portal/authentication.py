@@ -0,0 +1,45 @@
+from django.conf import settings
+from django.utils.functional import cached_property
+from rest_framework.permissions import SAFE_METHODS
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.models import TokenUser
+from rest_framework_simplejwt.settings import api_settings
+
+
+# Put into every token at login (MyTokenObtainPairSerializer.get_token) and
+# copied into refreshed access tokens, so reads need no auth_user query
+USER_CLAIMS = ('username', 'email', 'is_staff')
+
+
+class PortalTokenUser(TokenUser):
+    """The user of a request, read from the access token's claims."""
+
+    @cached_property
+    def email(self):
+        return self.token.get('email') or ''
+
+
+class ClaimsJWTAuthentication(JWTAuthentication):
+    """
+    JWTAuthentication that trusts the token's claims on safe (read-only)
+    requests instead of loading auth_user: request.user is then a
+    PortalTokenUser with id, username, email and is_staff. Writes, and tokens
+    issued before the claims were added, still load the User row. A user
+    deactivated or demoted after login keeps read access until the access
+    token expires (ACCESS_TOKEN_LIFETIME); set JWT_STATELESS_READS = False to
+    check the database on every request.
+    """
+
+    def get_user(self, validated_token):
+        request = getattr(self, '_request', None)
+        if (settings.JWT_STATELESS_READS and request is not None
+                and request.method in SAFE_METHODS
+                and api_settings.USER_ID_CLAIM in validated_token
+                and all(claim in validated_token for claim in USER_CLAIMS)):
+            return PortalTokenUser(validated_token)
+        return super().get_user(validated_token)
+
+    def authenticate(self, request):
+        # DRF builds the authenticators per request, so this is not shared
+        self._request = request
+        return super().authenticate(request)
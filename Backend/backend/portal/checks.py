@@ -0,0 +1,17 @@
+from django.core.checks import Warning, register
+
+from .pdf_stream import PYPDF_PROBLEM, PYPDF_REQUIREMENT
+
+
+@register()
+def pypdf_check(app_configs, **kwargs):
+    """Warn when attendance and admit card PDFs cannot be streamed."""
+    if PYPDF_PROBLEM is None:
+        return []
+    return [Warning(
+        f"{PYPDF_PROBLEM}: attendance and admit card PDFs are drawn on one "
+        "canvas and held in memory until the whole document is done, and the "
+        "attendance download only starts once it is.",
+        hint=f"Install {PYPDF_REQUIREMENT!r}.",
+        id='portal.W001',
+    )]
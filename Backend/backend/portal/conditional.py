@@ -0,0 +1,110 @@
+import functools
+import hashlib
+import json
+
+from django.conf import settings
+from django.db.models import Count, Max
+from django.utils.cache import get_conditional_response, patch_cache_control, patch_vary_headers
+from django.utils.http import quote_etag
+
+from .models import DataVersion, SchoolApplicant
+
+
+# DataVersion counters each endpoint's payload is built from
+POST_VERSIONS = ('post', 'subcategory')
+SUBCATEGORY_VERSIONS = ('subcategory',)
+ADMIT_CARD_VERSIONS = ('applicant', 'seatplan', 'subcategory', 'post')
+
+
+def make_etag(request, *parts):
+    """
+    Strong ETag over cheap version data (counters, updated_at values), plus
+    the negotiated format so JSON and the browsable API never share one.
+    """
+    renderer = getattr(request, 'accepted_renderer', None)
+    payload = json.dumps([getattr(renderer, 'format', None), parts], default=str, sort_keys=True)
+    return quote_etag(hashlib.sha256(payload.encode()).hexdigest()[:32])
+
+
+def _cache_headers(response, etag, private):
+    response['ETag'] = etag
+    if private:
+        # Per user: browsers keep it but revalidate each time, shared caches skip it
+        patch_cache_control(response, private=True, no_cache=True)
+        patch_vary_headers(response, ('Authorization',))
+    else:
+        patch_cache_control(response, public=True, max_age=settings.PUBLIC_API_MAX_AGE)
+    return response
+
+
+def conditional_response(request, etag, build, private=False):
+    """
+    Answer a GET/HEAD whose If-None-Match has `etag` with 304, without
+    calling `build`; otherwise return build()'s response with the ETag and
+    Cache-Control headers added.
+    """
+    if request.method in ('GET', 'HEAD'):
+        not_modified = get_conditional_response(request, etag=etag)
+        if not_modified is not None:
+            return _cache_headers(not_modified, etag, private)
+    response = build()
+    if response.status_code == 200:
+        _cache_headers(response, etag, private)
+    return response
+
+
+def conditional_view(etag_func, private=False):
+    """
+    conditional_response() for a function view; goes under @api_view (and
+    @permission_classes) so the request is authenticated before
+    etag_func(request, *args, **kwargs) runs.
+    """
+    def decorator(view):
+        @functools.wraps(view)
+        def wrapper(request, *args, **kwargs):
+            etag = etag_func(request, *args, **kwargs)
+            return conditional_response(request, etag, lambda: view(request, *args, **kwargs), private)
+        return wrapper
+    return decorator
+
+
+class ConditionalGetMixin:
+    """
+    ETag validation for a viewset's list and retrieve actions. The ETag is
+    made from the DataVersion counters named in `etag_versions`, which the
+    signals bump whenever the underlying rows change.
+    """
+    etag_versions = ()
+    etag_private = False
+
+    def get_etag(self, request):
+        return make_etag(request, DataVersion.current(*self.etag_versions))
+
+    def list(self, request, *args, **kwargs):
+        return conditional_response(request, self.get_etag(request),
+                                    lambda: super(ConditionalGetMixin, self).list(request, *args, **kwargs),
+                                    self.etag_private)
+
+    def retrieve(self, request, *args, **kwargs):
+        return conditional_response(request, self.get_etag(request),
+                                    lambda: super(ConditionalGetMixin, self).retrieve(request, *args, **kwargs),
+                                    self.etag_private)
+
+
+def subcategories_etag(request, post_id):
+    return make_etag(request, DataVersion.current(*SUBCATEGORY_VERSIONS))
+
+
+def admit_card_etag(request, subcategory_id):
+    # updated_at catches edits to the applicant; the counters catch rolls
+    # (bulk updates leave updated_at alone), seats and renamed posts
+    row = (SchoolApplicant.objects.filter(email=request.user.email, subcategory_id=subcategory_id)
+           .values_list('id', 'updated_at').first())
+    return make_etag(request, request.user.email, row, DataVersion.current(*ADMIT_CARD_VERSIONS))
+
+
+def admit_cards_etag(request):
+    rows = (SchoolApplicant.objects.filter(email=request.user.email, is_submit=True)
+            .aggregate(count=Count('id'), updated=Max('updated_at')))
+    return make_etag(request, request.user.email, request.query_params.get('subcategory_ids'),
+                     rows, DataVersion.current(*ADMIT_CARD_VERSIONS))
@@ -1,4 +1,16 @@
 from django import forms
 
 class UploadFileForm(forms.Form):
-    file = forms.FileField(label="Select Excel File")
+    file = forms.FileField(
+        label="Select Excel or CSV File",
+        widget=forms.ClearableFileInput(attrs={'accept': '.xlsx,.xlsm,.xls,.csv'}),
+    )
+    mode = forms.ChoiceField(
+        label="Import mode",
+        choices=[
+            ('append', "Add the rows to the seat plan"),
+            ('replace', "Replace the seats of the uploaded post codes/centers (preview the changes first)"),
+        ],
+        initial='append',
+        widget=forms.RadioSelect,
+    )
@@ -0,0 +1,234 @@
+import hashlib
+import json
+import os
+import re
+import traceback
+import uuid
+
+from django.conf import settings
+from django.utils import timezone
+
+from .admit_cards import admit_cards, render_admit_cards_pdf, write_admit_cards_zip
+from .attendance import sheet_date
+from .models import BackgroundJob, DataVersion, SchoolApplicant, SubCategory
+from .pdf_cache import ATTENDANCE_VERSIONS, attendance_pdf
+from .seatplan_import import SeatPlanImportError, import_seatplan_file, stage_file
+
+
+class JobError(Exception):
+    """A job failed for a reason worth showing to staff as-is."""
+
+
+# Data sets a job kind reads; a finished job is only reused while they are unchanged
+JOB_VERSIONS = {
+    'attendance': ATTENDANCE_VERSIONS,
+    'admit_cards': ('seatplan', 'applicant', 'subcategory'),
+}
+
+
+# Kinds whose output prints the render date; yesterday's result is stale
+DATED_KINDS = ('attendance',)
+
+
+def _dedupe_key(kind, params):
+    payload = json.dumps({
+        'kind': kind,
+        'params': params,
+        'versions': DataVersion.current(*JOB_VERSIONS.get(kind, ())),
+        'date': sheet_date().isoformat() if kind in DATED_KINDS else None,
+    }, sort_keys=True)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+def result_path(job):
+    return os.path.join(settings.GENERATED_FILES_ROOT, job.result_file)
+
+
+def progress_path(job):
+    return os.path.join(settings.GENERATED_FILES_ROOT, 'progress', f"job_{job.pk}.json")
+
+
+def write_progress(job, data):
+    """
+    Record a running job's progress for the status endpoint. It lives in a
+    small JSON file rather than on the row because the job's own database
+    writes are inside a transaction other connections cannot see yet.
+    """
+    path = progress_path(job)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp = f"{path}.tmp"
+    with open(tmp, 'w') as fh:
+        json.dump(data, fh)
+    os.replace(tmp, path)
+
+
+def read_progress(job):
+    try:
+        with open(progress_path(job)) as fh:
+            return json.load(fh)
+    except (OSError, ValueError):
+        return {}
+
+
+def save_upload(uploaded):
+    """Keep an uploaded file for a background job; returns its path relative to GENERATED_FILES_ROOT."""
+    ext = os.path.splitext(uploaded.name)[1].lower()
+    relpath = os.path.join('uploads', f"{uuid.uuid4().hex}{ext}")
+    path = os.path.join(settings.GENERATED_FILES_ROOT, relpath)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, 'wb') as fh:
+        for chunk in uploaded.chunks():
+            fh.write(chunk)
+    return relpath
+
+
+def enqueue_job(kind, params, user=None):
+    """
+    Queue a job, or return the queued/running/finished job that already has
+    the same kind and params so identical exports are only rendered once.
+    """
+    key = _dedupe_key(kind, params)
+    existing = (BackgroundJob.objects
+                .filter(dedupe_key=key, status__in=[BackgroundJob.STATUS_QUEUED,
+                                                    BackgroundJob.STATUS_RUNNING,
+                                                    BackgroundJob.STATUS_DONE])
+                .order_by('-created_at')
+                .first())
+    if existing and (existing.status != BackgroundJob.STATUS_DONE or os.path.exists(result_path(existing))):
+        return existing
+    return BackgroundJob.objects.create(
+        kind=kind,
+        params=params,
+        dedupe_key=key,
+        created_by=user if user is not None and user.is_authenticated else None,
+    )
+
+
+def claim_next_job():
+    """
+    Atomically move the oldest queued job to running. The conditional UPDATE
+    makes it safe to run several workers against the same table.
+    """
+    while True:
+        job = (BackgroundJob.objects
+               .filter(status=BackgroundJob.STATUS_QUEUED)
+               .order_by('created_at', 'id')
+               .first())
+        if job is None:
+            return None
+        claimed = (BackgroundJob.objects
+                   .filter(pk=job.pk, status=BackgroundJob.STATUS_QUEUED)
+                   .update(status=BackgroundJob.STATUS_RUNNING, started_at=timezone.now()))
+        if claimed:
+            job.refresh_from_db()
+            return job
+
+
+def run_attendance_job(job):
+    path = attendance_pdf(job.params)
+    if path is None:
+        raise JobError("No SeatPlan data found for the selected filters.")
+    name = f"attendance_sheets_{job.params.get('center') or 'All_Centers'}.pdf"
+    return os.path.relpath(path, settings.GENERATED_FILES_ROOT), name
+
+
+def run_seatplan_import_job(job):
+    """
+    Import (mode 'append') or stage for review (mode 'replace') an uploaded
+    seat plan. Rejected rows become the job's downloadable CSV.
+    """
+    path = os.path.join(settings.GENERATED_FILES_ROOT, job.params['file'])
+    state = {}
+
+    def progress(counts):
+        state.update(counts)
+        write_progress(job, state)
+
+    try:
+        with open(path, 'rb') as fh:
+            if job.params.get('mode') == 'replace':
+                result = stage_file(fh, progress=progress)
+                state['batch'] = result.batch
+            else:
+                result = import_seatplan_file(fh, progress=progress)
+    except SeatPlanImportError as e:
+        raise JobError(str(e))
+    finally:
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+    state['done'] = True
+    write_progress(job, state)
+
+    if not len(result.rejected):
+        return '', ''
+    relpath = os.path.join('imports', f"seatplan_import_{job.pk}_rejected.csv")
+    target = os.path.join(settings.GENERATED_FILES_ROOT, relpath)
+    os.makedirs(os.path.dirname(target), exist_ok=True)
+    result.rejected.to_csv(target, index=False)
+    return relpath, f"seatplan_rejected_rows_{job.pk}.csv"
+
+
+def run_admit_cards_job(job):
+    """
+    Render the admit cards of a subcategory as one merged PDF (format 'pdf')
+    or a ZIP with a PDF per candidate (format 'zip').
+    """
+    subcategory = SubCategory.objects.filter(pk=job.params.get('subcategory_id')).first()
+    if subcategory is None:
+        raise JobError("Subcategory not found.")
+    total = (SchoolApplicant.objects.filter(subcategory=subcategory, roll_number__isnull=False)
+             .exclude(roll_number='').count())
+    if not total:
+        raise JobError("No applicant of this subcategory has a roll number yet.")
+    state = {'total': total, 'rendered': 0}
+    write_progress(job, state)
+
+    def progress(done):
+        state['rendered'] = done
+        write_progress(job, state)
+
+    fmt = 'zip' if job.params.get('format') == 'zip' else 'pdf'
+    relpath = os.path.join('admit_cards', f"admit_cards_{subcategory.pk}_{job.pk}.{fmt}")
+    target = os.path.join(settings.GENERATED_FILES_ROOT, relpath)
+    os.makedirs(os.path.dirname(target), exist_ok=True)
+    tmp = f"{target}.tmp"
+    try:
+        with open(tmp, 'wb') as fh:
+            if fmt == 'zip':
+                write_admit_cards_zip(admit_cards(subcategory.pk), fh, progress=progress)
+            else:
+                render_admit_cards_pdf(admit_cards(subcategory.pk), fh, progress=progress)
+        os.replace(tmp, target)
+    finally:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+    state['done'] = True
+    write_progress(job, state)
+    label = re.sub(r'[^A-Za-z0-9.-]+', '_', subcategory.custom_id or subcategory.name).strip('_')
+    return relpath, f"admit_cards_{label or subcategory.pk}.{fmt}"
+
+
+JOB_HANDLERS = {
+    'attendance': run_attendance_job,
+    'seatplan_import': run_seatplan_import_job,
+    'admit_cards': run_admit_cards_job,
+}
+
+
+def run_job(job):
+    """Run a claimed job and record its outcome on the row."""
+    try:
+        job.result_file, job.result_name = JOB_HANDLERS[job.kind](job)
+        job.status = BackgroundJob.STATUS_DONE
+        job.error = ''
+    except JobError as e:
+        job.status = BackgroundJob.STATUS_FAILED
+        job.error = str(e)
+    except Exception:
+        job.status = BackgroundJob.STATUS_FAILED
+        job.error = traceback.format_exc()
+    job.finished_at = timezone.now()
+    job.save(update_fields=['result_file', 'result_name', 'status', 'error', 'finished_at'])
+    return job
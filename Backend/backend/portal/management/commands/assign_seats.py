@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from portal.seating import assign_seats
+
+
+class Command(BaseCommand):
+    help = "Recompute which applicant sits in which SeatPlan seat."
+
+    def handle(self, *args, **options):
+        assigned = assign_seats()
+        self.stdout.write(self.style.SUCCESS(f"Assigned applicants to {assigned} seat(s)."))
@@ -0,0 +1,100 @@
+import datetime
+import random
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+
+from portal.applicant_numbers import ApplicantNumberAllocator
+from portal.models import NumberSequence, SchoolApplicant
+
+
+SEQUENCE_NAME = 'benchmark_applicant_number'
+
+BATCH_SIZE = 2000
+
+
+class QueryCounter:
+    # connection.queries caps at 9000 entries; the legacy method needs more
+    def __init__(self):
+        self.count = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        self.count += 1
+        return execute(sql, params, many, context)
+
+
+def _fill(numbers):
+    SchoolApplicant.objects.bulk_create([
+        SchoolApplicant(
+            applicant_number=number, student_name="Benchmark", dob=datetime.date(2010, 1, 1),
+            gender='Male', student_class='6', father_name="F", mother_name="M", contact="0",
+            # Marks the rows deleted after the run
+            reason=SEQUENCE_NAME,
+        )
+        for number in numbers
+    ], batch_size=BATCH_SIZE)
+
+
+def _legacy_number(digits, rng):
+    # The allocator this replaced: random pick, one exists() per attempt
+    while True:
+        number = str(rng.randint(1, 10 ** digits - 1)).zfill(digits)
+        if not SchoolApplicant.objects.filter(applicant_number=number).exists():
+            return number
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare applicant number allocation (random retry vs shuffled sequence) "
+        "as the number space fills up. Uses a small number width so high "
+        "occupancy is cheap to set up; the rows every run writes are deleted after it."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--digits', type=int, default=5, help="Number width (5 = 100,000 numbers).")
+        parser.add_argument('--occupancy', type=float, nargs='+', default=[0.0, 0.5, 0.9, 0.98])
+        parser.add_argument('--allocations', type=int, default=1000, help="Numbers allocated per measurement.")
+        parser.add_argument('--block-size', type=int, default=100)
+        parser.add_argument('--seed', type=int, default=1)
+
+    def handle(self, *args, **options):
+        digits = options['digits']
+        size = 10 ** digits
+        self.stdout.write(f"{'occupancy':>9} {'method':>9} {'us/number':>10} {'queries/number':>15}")
+        for occupancy in options['occupancy']:
+            filled = int(size * occupancy)
+            if filled + options['allocations'] >= size:
+                self.stderr.write(f"Skipping {occupancy:.0%}: not enough free numbers left.")
+                continue
+            for method in ('random', 'sequence'):
+                seconds, queries = self.run(method, digits, filled, options)
+                n = options['allocations']
+                self.stdout.write(f"{occupancy:>9.0%} {method:>9} {seconds / n * 1e6:>10.1f} {queries / n:>15.3f}")
+
+    def run(self, method, digits, filled, options):
+        rng = random.Random(options['seed'])
+        allocator = ApplicantNumberAllocator(digits, 'benchmark', options['block_size'], sequence_name=SEQUENCE_NAME)
+        try:
+            with transaction.atomic():
+                if method == 'random':
+                    _fill(str(n).zfill(digits) for n in rng.sample(range(1, 10 ** digits), filled))
+                else:
+                    # The state after `filled` numbers were handed out in order
+                    _fill(str(allocator.permute(v)).zfill(digits) for v in range(1, filled + 1))
+                    NumberSequence.objects.update_or_create(name=SEQUENCE_NAME, defaults={'last_value': filled})
+            # Allocate in autocommit, like a request does: inside a transaction
+            # the allocator takes one value at a time instead of a block
+            counter = QueryCounter()
+            with connection.execute_wrapper(counter):
+                start = time.perf_counter()
+                for _ in range(options['allocations']):
+                    if method == 'random':
+                        _legacy_number(digits, rng)
+                    else:
+                        allocator.next()
+                seconds = time.perf_counter() - start
+        finally:
+            SchoolApplicant.objects.filter(reason=SEQUENCE_NAME).delete()
+            NumberSequence.objects.filter(name=SEQUENCE_NAME).delete()
+        return seconds, counter.count
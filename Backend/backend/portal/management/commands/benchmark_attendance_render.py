@@ -0,0 +1,87 @@
+import io
+import time
+
+from django.core.management.base import BaseCommand
+
+from portal.attendance import attendance_zip, render_attendance
+
+
+def synthetic_rooms(rooms, seats, photo=None, signature=None):
+    for r in range(rooms):
+        rows = [{
+            'post': 'Assistant Teacher',
+            'roll': f"AT{r * seats + s + 1:07d}",
+            'name': f"Applicant {r * seats + s + 1}",
+            'photo': photo,
+            'signature': signature,
+        } for s in range(seats)]
+        yield {
+            'center': f"Center {r // 20 + 1}",
+            'building': 'Main',
+            'floor': str(r % 5 + 1),
+            'room': str(r + 1),
+            'post_label': 'Assistant Teacher',
+            'code_label': 'AT-01',
+            'exam_time': '2025-01-01 10:00',
+            'roll_range': f"{rows[0]['roll']} to {rows[-1]['roll']}" if rows else "No rolls assigned",
+            'first_roll': rows[0]['roll'] if rows else '',
+            'last_roll': rows[-1]['roll'] if rows else '',
+            'rows': rows,
+        }
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare attendance PDF rendering with and without reusable form XObjects, "
+        "or, with --workers, time the merged PDF and the per-room ZIP per worker count."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rooms', type=int, default=200)
+        parser.add_argument('--seats', type=int, default=40, help="Seats per room.")
+        parser.add_argument('--repeat', type=int, default=3, help="Best of N runs per mode.")
+        parser.add_argument('--photo', default=None, help="Upload name (under MEDIA_ROOT) used for every photo.")
+        parser.add_argument('--signature', default=None, help="Upload name (under MEDIA_ROOT) used for every signature.")
+        parser.add_argument('--workers', type=int, nargs='+', default=None,
+                            help="Time both exports with each of these ATTENDANCE_RENDER_WORKERS values.")
+
+    def handle(self, *args, **options):
+        if options['workers']:
+            return self.benchmark_workers(options)
+        results = {}
+        for use_forms in (False, True):
+            best, size = None, 0
+            for _ in range(options['repeat']):
+                rooms = synthetic_rooms(options['rooms'], options['seats'], options['photo'], options['signature'])
+                buf = io.BytesIO()
+                start = time.perf_counter()
+                render_attendance(rooms, buf, use_forms=use_forms)
+                elapsed = time.perf_counter() - start
+                best = elapsed if best is None else min(best, elapsed)
+                size = buf.tell()
+            results[use_forms] = (best, size)
+            label = "forms" if use_forms else "inline"
+            self.stdout.write(f"{label:>6}: {best:8.3f}s  {size / 1024:10.1f} KiB")
+
+        (t_inline, s_inline), (t_forms, s_forms) = results[False], results[True]
+        self.stdout.write(self.style.SUCCESS(
+            f"forms vs inline: time x{t_forms / t_inline:.2f}, size x{s_forms / s_inline:.2f}"
+        ))
+
+    def benchmark_workers(self, options):
+        exports = (
+            ('pdf', lambda rooms, workers: render_attendance(rooms, io.BytesIO(), workers=workers)),
+            ('zip', lambda rooms, workers: sum(len(chunk) for chunk in attendance_zip(rooms, workers=workers))),
+        )
+        for label, export in exports:
+            baseline = None
+            for workers in options['workers']:
+                best = None
+                for _ in range(options['repeat']):
+                    rooms = synthetic_rooms(options['rooms'], options['seats'], options['photo'], options['signature'])
+                    start = time.perf_counter()
+                    export(rooms, workers)
+                    elapsed = time.perf_counter() - start
+                    best = elapsed if best is None else min(best, elapsed)
+                baseline = baseline or best
+                self.stdout.write(f"{label}, {workers:>2} worker(s): {best:8.3f}s  x{baseline / best:.2f}")
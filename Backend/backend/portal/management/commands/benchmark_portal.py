@@ -0,0 +1,228 @@
+import contextlib
+import datetime
+import io
+import json
+import platform
+import shutil
+import statistics
+import tempfile
+import time
+import tracemalloc
+
+import django
+import pandas as pd
+from django.contrib.auth.models import User
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.db.models import Count
+from django.test import Client, override_settings
+from django.test.utils import CaptureQueriesContext, setup_test_environment, teardown_test_environment
+
+from portal.jobs import claim_next_job, run_job
+from portal.models import PortalPost, SchoolApplicant, SeatPlan, SubCategory
+from portal.views import MyTokenObtainPairSerializer
+
+from .generate_synthetic_data import APPLICANT_NUMBER_PREFIX, USERNAME_PREFIX
+
+
+class Rollback(Exception):
+    """Raised to undo everything a benchmark run wrote."""
+
+
+def _consume(response):
+    if response.streaming:
+        size = sum(len(chunk) for chunk in response.streaming_content)
+    else:
+        size = len(response.content)
+    response.close()
+    return size
+
+
+class Command(BaseCommand):
+    help = (
+        "Time the portal's heavy paths against the current database and print "
+        "wall time, query count and peak memory per scenario as JSON. Every "
+        "run is rolled back, so results are repeatable. Seed the database with "
+        "generate_synthetic_data first."
+    )
+
+    SCENARIOS = (
+        'upload_seatplan',
+        'generate_rolls',
+        'attendance_sheet',
+        'admit_card',
+        'posts_list',
+        'user_applications',
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--repeat', type=int, default=3, help="Timed runs per scenario.")
+        parser.add_argument('--only', nargs='+', choices=self.SCENARIOS, help="Run just these scenarios.")
+        parser.add_argument('--upload-rows', type=int, default=2000, help="Rows in the uploaded seat plan sheet.")
+        parser.add_argument('--render-workers', type=int, default=None,
+                            help="ATTENDANCE_RENDER_WORKERS for the attendance exports.")
+        parser.add_argument('--no-memory', action='store_true', help="Skip the tracemalloc run.")
+        parser.add_argument('--output', help="Write the JSON report to this file instead of stdout.")
+
+    def handle(self, *args, **options):
+        user = (User.objects.filter(username__startswith=USERNAME_PREFIX)
+                .annotate(n=Count('schoolapplicant')).filter(n__gt=0).order_by('-n', 'id').first())
+        if user is None:
+            raise CommandError("No synthetic data found; run generate_synthetic_data first.")
+        self.user = user
+        # The token a real login issues, with the claims reads are served from
+        self.token = str(MyTokenObtainPairSerializer.get_token(user).access_token)
+        self.admit_subcategory_id = (SchoolApplicant.objects.filter(user=user)
+                                     .values_list('subcategory_id', flat=True).first())
+        self.rolls_subcategory_id = (SubCategory.objects.filter(custom_id__isnull=False)
+                                     .annotate(n=Count('schoolapplicant')).order_by('-n', 'id')
+                                     .values_list('id', flat=True).first())
+        self.upload_sheet = self.build_upload_sheet(options['upload_rows'])
+
+        workdir = tempfile.mkdtemp(prefix='portal_bench_')
+        overrides = {'GENERATED_FILES_ROOT': workdir, 'PDF_CACHE_ROOT': workdir}
+        if options['render_workers'] is not None:
+            overrides['ATTENDANCE_RENDER_WORKERS'] = options['render_workers']
+
+        setup_test_environment()
+        try:
+            with override_settings(**overrides):
+                results = {}
+                for name in options['only'] or self.SCENARIOS:
+                    self.stderr.write(f"Running {name}...")
+                    # Views print debug output; keep stdout for the report
+                    with contextlib.redirect_stdout(self.stderr):
+                        results[name] = self.measure(name, options['repeat'], not options['no_memory'])
+        finally:
+            teardown_test_environment()
+            shutil.rmtree(workdir, ignore_errors=True)
+
+        report = {
+            'meta': {
+                'timestamp': datetime.datetime.now(datetime.timezone.utc).isoformat(),
+                'python': platform.python_version(),
+                'django': django.get_version(),
+                'database': connection.vendor,
+                'repeat': options['repeat'],
+                'rows': {
+                    'posts': PortalPost.objects.count(),
+                    'subcategories': SubCategory.objects.count(),
+                    'applicants': SchoolApplicant.objects.count(),
+                    'synthetic_applicants': SchoolApplicant.objects.filter(
+                        applicant_number__startswith=APPLICANT_NUMBER_PREFIX).count(),
+                    'seats': SeatPlan.objects.count(),
+                },
+                'upload_rows': options['upload_rows'],
+            },
+            'results': results,
+        }
+        out = json.dumps(report, indent=2)
+        if options['output']:
+            with open(options['output'], 'w') as fh:
+                fh.write(out + "\n")
+        else:
+            self.stdout.write(out)
+
+    # -- measurement -------------------------------------------------------
+
+    def measure(self, name, repeat, with_memory):
+        times, queries, status, size = [], None, None, None
+        for _ in range(max(1, repeat)):
+            run = self.run_once(name)
+            times.append(run['seconds'])
+            queries, status, size = run['queries'], run['status'], run['bytes']
+        result = {
+            'status': status,
+            'response_bytes': size,
+            'queries': queries,
+            'wall_time_s': {
+                'min': round(min(times), 4),
+                'median': round(statistics.median(times), 4),
+                'runs': [round(t, 4) for t in times],
+            },
+        }
+        if with_memory:
+            # A separate run, so tracing overhead does not skew the timings.
+            # Only this process is traced, not attendance render workers.
+            tracemalloc.start()
+            try:
+                self.run_once(name)
+                result['peak_memory_bytes'] = tracemalloc.get_traced_memory()[1]
+            finally:
+                tracemalloc.stop()
+        return result
+
+    def run_once(self, name):
+        client = Client()
+        run = {}
+        try:
+            with transaction.atomic():
+                request = getattr(self, f"prepare_{name}")(client)
+                with CaptureQueriesContext(connection) as ctx:
+                    start = time.perf_counter()
+                    response = request()
+                    run['bytes'] = _consume(response)
+                    run['seconds'] = time.perf_counter() - start
+                run['queries'] = len(ctx.captured_queries)
+                run['status'] = response.status_code
+                raise Rollback
+        except Rollback:
+            pass
+        return run
+
+    def staff_client(self, client):
+        staff = User.objects.create_superuser('benchmark_staff', 'benchmark@example.com', None)
+        client.force_login(staff)
+
+    def build_upload_sheet(self, rows):
+        seats = list(SeatPlan.objects.values(
+            'post_code', 'post_name', 'exam_center', 'building', 'floor', 'room_no', 'exam_date_time',
+        ).order_by('id')[:rows])
+        if not seats:
+            raise CommandError("The seat plan is empty; run generate_synthetic_data first.")
+        frame = pd.DataFrame([
+            dict(seats[i % len(seats)], roll=None, room_no=f"U{i // 40 + 1:03d}")
+            for i in range(rows)
+        ])
+        buf = io.BytesIO()
+        frame.to_excel(buf, index=False)
+        return buf.getvalue()
+
+    # -- scenarios: each prepares untimed state and returns the timed call --
+
+    def prepare_upload_seatplan(self, client):
+        self.staff_client(client)
+        upload = SimpleUploadedFile(
+            'seatplan.xlsx', self.upload_sheet,
+            content_type='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
+        )
+
+        def upload_and_import():
+            # The view only queues the import; run it here like run_jobs would
+            response = client.post('/api/upload-seatplan/', {'file': upload, 'mode': 'append'})
+            job = claim_next_job()
+            if job is not None:
+                run_job(job)
+            return response
+
+        return upload_and_import
+
+    def prepare_generate_rolls(self, client):
+        self.staff_client(client)
+        SchoolApplicant.objects.filter(subcategory_id=self.rolls_subcategory_id).update(roll_number=None)
+        return lambda: client.post('/api/admin-tools/generate-rolls/', {'subcategory_id': self.rolls_subcategory_id})
+
+    def prepare_attendance_sheet(self, client):
+        self.staff_client(client)
+        return lambda: client.get('/api/attendance-sheet/generate/', {'all': '1'})
+
+    def prepare_admit_card(self, client):
+        return lambda: client.get(f'/api/admit-card/{self.admit_subcategory_id}/',
+                                  HTTP_AUTHORIZATION=f'Bearer {self.token}')
+
+    def prepare_posts_list(self, client):
+        return lambda: client.get('/api/posts/')
+
+    def prepare_user_applications(self, client):
+        return lambda: client.get('/api/my-applications/', HTTP_AUTHORIZATION=f'Bearer {self.token}')
@@ -0,0 +1,39 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from portal.admit_cards import admit_cards, render_admit_cards_pdf, write_admit_cards_zip
+from portal.models import SubCategory
+
+
+class Command(BaseCommand):
+    help = (
+        "Render the admit cards of a subcategory for printing: one merged PDF, "
+        "or a ZIP with a PDF per candidate and a CSV manifest."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('subcategory_id', type=int)
+        parser.add_argument('output', help="File to write (.pdf or .zip).")
+        parser.add_argument('--format', choices=('pdf', 'zip'), default=None,
+                            help="Defaults to the output file's extension.")
+        parser.add_argument('--workers', type=int, default=None,
+                            help="Render processes (default: ADMIT_CARD_RENDER_WORKERS).")
+
+    def handle(self, *args, **options):
+        if not SubCategory.objects.filter(pk=options['subcategory_id']).exists():
+            raise CommandError(f"Subcategory {options['subcategory_id']} does not exist.")
+        fmt = options['format'] or ('zip' if options['output'].lower().endswith('.zip') else 'pdf')
+        render = write_admit_cards_zip if fmt == 'zip' else render_admit_cards_pdf
+
+        started = time.perf_counter()
+        with open(options['output'], 'wb') as fh:
+            count = render(admit_cards(options['subcategory_id']), fh, workers=options['workers'])
+        elapsed = time.perf_counter() - started
+        if not count:
+            self.stderr.write("No applicant of this subcategory has a roll number yet.")
+            return
+        self.stdout.write(self.style.SUCCESS(
+            f"Wrote {count} admit card(s) to {options['output']} in {elapsed:.1f}s "
+            f"({count / max(elapsed, 1e-9):.0f} cards/s)."
+        ))
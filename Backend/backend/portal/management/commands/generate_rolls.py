@@ -0,0 +1,35 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from portal.rolls import generate_all_rolls
+
+
+class Command(BaseCommand):
+    help = (
+        "Assign roll numbers to every applicant still without one, for all "
+        "subcategories with a custom_id. Safe to re-run: applicants who "
+        "already have a roll are left alone."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, default=None,
+                            help="Subcategories numbered in parallel (default: ROLL_GENERATION_WORKERS).")
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        outcomes = generate_all_rolls(workers=options['workers'])
+        total = 0
+        for o in outcomes:
+            sub = f"{o.subcategory.name} (ID: {o.subcategory.pk})"
+            if o.result is not None:
+                total += o.result.assigned
+                self.stdout.write(f"{o.result.prefix:<4} {o.result.assigned:>8} roll(s)  {o.seconds:7.2f}s  {sub}")
+            if o.error:
+                self.stderr.write(self.style.ERROR(f"{sub}: {o.error}"))
+        self.stdout.write(self.style.SUCCESS(
+            f"Assigned {total} roll(s) across {len(outcomes)} subcategories "
+            f"in {time.perf_counter() - started:.2f}s."
+        ))
+        if any(o.error for o in outcomes):
+            raise CommandError("Some subcategories could not be fully numbered; see above.")
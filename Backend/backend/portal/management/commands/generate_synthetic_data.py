@@ -0,0 +1,206 @@
+import datetime
+import math
+import os
+import random
+
+from django.conf import settings
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from PIL import Image, ImageDraw
+
+from portal.models import DataVersion, PortalPost, SchoolApplicant, SeatPlan, SubCategory
+from portal.seating import assign_seats
+
+
+# Every synthetic row carries one of these markers so --flush can find it again
+POST_TITLE_PREFIX = "Synthetic post"
+USERNAME_PREFIX = "synthetic_user_"
+APPLICANT_NUMBER_PREFIX = "SYN"
+CENTER_PREFIX = "Synthetic Center"
+
+BATCH_SIZE = 1000
+
+
+def _code(n):
+    """Three-letter roll prefix for the n-th synthetic subcategory (AAA, AAB, ...)."""
+    letters = []
+    for _ in range(3):
+        n, r = divmod(n, 26)
+        letters.append(chr(ord('A') + r))
+    return ''.join(reversed(letters))
+
+
+def _write_images(variants, rng):
+    """Small photo/signature uploads, shared round-robin by the applicants."""
+    photos, signatures = [], []
+    for n in range(variants):
+        photo = os.path.join('applicant_photos', f"synthetic_photo_{n:03d}.jpg")
+        signature = os.path.join('applicant_signatures', f"synthetic_signature_{n:03d}.png")
+        photo_path = os.path.join(settings.MEDIA_ROOT, photo)
+        signature_path = os.path.join(settings.MEDIA_ROOT, signature)
+        if not os.path.exists(photo_path):
+            os.makedirs(os.path.dirname(photo_path), exist_ok=True)
+            img = Image.new('RGB', (300, 360), tuple(rng.randrange(120, 230) for _ in range(3)))
+            draw = ImageDraw.Draw(img)
+            draw.ellipse((90, 60, 210, 200), fill=tuple(rng.randrange(40, 120) for _ in range(3)))
+            draw.rectangle((50, 220, 250, 360), fill=tuple(rng.randrange(40, 120) for _ in range(3)))
+            img.save(photo_path, 'JPEG', quality=85)
+        if not os.path.exists(signature_path):
+            os.makedirs(os.path.dirname(signature_path), exist_ok=True)
+            img = Image.new('RGBA', (300, 80), (255, 255, 255, 0))
+            draw = ImageDraw.Draw(img)
+            points = [(10 + i * 14, 40 + rng.randrange(-25, 25)) for i in range(21)]
+            draw.line(points, fill=(20, 20, 80, 255), width=3)
+            img.save(signature_path, 'PNG')
+        photos.append(photo)
+        signatures.append(signature)
+    return photos, signatures
+
+
+class Command(BaseCommand):
+    help = (
+        "Fill the database with synthetic posts, subcategories, applicants (with "
+        "small image files) and a seat plan spread over centers and rooms."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--posts', type=int, default=5)
+        parser.add_argument('--subcategories-per-post', type=int, default=4)
+        parser.add_argument('--applicants', type=int, default=5000)
+        parser.add_argument('--applications-per-user', type=int, default=3,
+                            help="Applications each synthetic user owns (in different subcategories).")
+        parser.add_argument('--centers', type=int, default=10)
+        parser.add_argument('--seats-per-room', type=int, default=40)
+        parser.add_argument('--rooms-per-floor', type=int, default=10)
+        parser.add_argument('--image-variants', type=int, default=50,
+                            help="Distinct photo/signature files written under MEDIA_ROOT.")
+        parser.add_argument('--seed', type=int, default=1, help="Random seed, for repeatable data.")
+        parser.add_argument('--flush', action='store_true', help="Delete earlier synthetic data first.")
+
+    def handle(self, *args, **options):
+        rng = random.Random(options['seed'])
+        if options['flush']:
+            self.flush()
+
+        subcategory_count = options['posts'] * options['subcategories_per_post']
+        applicant_count = options['applicants']
+        per_user = max(1, min(options['applications_per_user'], subcategory_count))
+        user_count = max(1, math.ceil(applicant_count / per_user))
+        photos, signatures = _write_images(max(1, options['image_variants']), rng)
+
+        with transaction.atomic():
+            start = SubCategory.objects.filter(post__title__startswith=POST_TITLE_PREFIX).count()
+            posts = PortalPost.objects.bulk_create([
+                PortalPost(
+                    title=f"{POST_TITLE_PREFIX} {start // options['subcategories_per_post'] + p + 1}",
+                    category='admission' if p % 2 == 0 else 'job',
+                    description="Generated for benchmarking.",
+                )
+                for p in range(options['posts'])
+            ])
+            subcategories = SubCategory.objects.bulk_create([
+                SubCategory(
+                    post=post,
+                    name=f"Class {s + 1}",
+                    custom_id=f"{_code(start + p * options['subcategories_per_post'] + s)}-SYN",
+                    application_fee=500,
+                )
+                for p, post in enumerate(posts)
+                for s in range(options['subcategories_per_post'])
+            ])
+
+            first_center = (SeatPlan.objects.filter(exam_center__startswith=CENTER_PREFIX)
+                            .values('exam_center').distinct().count())
+            password = make_password('synthetic')
+            first_user = User.objects.filter(username__startswith=USERNAME_PREFIX).count()
+            users = User.objects.bulk_create([
+                User(
+                    username=f"{USERNAME_PREFIX}{first_user + u + 1}",
+                    email=f"{USERNAME_PREFIX}{first_user + u + 1}@example.com",
+                    password=password,
+                )
+                for u in range(user_count)
+            ], batch_size=BATCH_SIZE)
+
+            # User u owns applicants u, u + U, u + 2U, ... which land in
+            # consecutive subcategories, so (email, subcategory) stays unique.
+            first_number = SchoolApplicant.objects.filter(
+                applicant_number__startswith=APPLICANT_NUMBER_PREFIX).count()
+            by_subcategory = {sc.pk: [] for sc in subcategories}
+            applicants = []
+            for i in range(applicant_count):
+                user = users[i % user_count]
+                subcategory = subcategories[(i // user_count) % subcategory_count]
+                applicant = SchoolApplicant(
+                    applicant_number=f"{APPLICANT_NUMBER_PREFIX}{first_number + i + 1:07d}",
+                    subcategory=subcategory,
+                    user=user,
+                    student_name=user.username,
+                    email=user.email,
+                    dob=datetime.date(2008, 1, 1) + datetime.timedelta(days=rng.randrange(1500)),
+                    gender=rng.choice(('Male', 'Female')),
+                    student_class=str(rng.randrange(6, 11)),
+                    father_name=f"Father {i + 1}",
+                    mother_name=f"Mother {i + 1}",
+                    contact=f"01{rng.randrange(10 ** 8, 10 ** 9)}",
+                    present_address="House 1, Road 2, Dhaka",
+                    permanent_address="Village 3, Post 4, District 5",
+                    photo=photos[i % len(photos)],
+                    signature=signatures[i % len(signatures)],
+                    is_submit=True,
+                )
+                by_subcategory[subcategory.pk].append(applicant)
+                applicants.append(applicant)
+
+            # Rolls follow the generate_rolls_view format: <3-char prefix><digits>
+            for subcategory in subcategories:
+                prefix = subcategory.custom_id[:3].upper()
+                for n, applicant in enumerate(by_subcategory[subcategory.pk], start=1):
+                    applicant.roll_number = f"{prefix}{n:05d}"
+            SchoolApplicant.objects.bulk_create(applicants, batch_size=BATCH_SIZE)
+
+            # One block of rooms per subcategory; centers are filled in turn so
+            # seat order (center, floor, room) matches roll order.
+            seats_per_room = options['seats_per_room']
+            total_rooms = sum(math.ceil(len(rows) / seats_per_room) for rows in by_subcategory.values())
+            rooms_per_center = max(1, math.ceil(total_rooms / max(1, options['centers'])))
+            room = 0
+            seats = []
+            for subcategory in subcategories:
+                rolls = [a.roll_number for a in by_subcategory[subcategory.pk]]
+                for offset in range(0, len(rolls), seats_per_room):
+                    center, room_in_center = divmod(room, rooms_per_center)
+                    for roll in rolls[offset:offset + seats_per_room]:
+                        seats.append(SeatPlan(
+                            post_code=subcategory.custom_id,
+                            post_name=subcategory.name,
+                            exam_center=f"{CENTER_PREFIX} {first_center + center + 1:02d}",
+                            building='A',
+                            floor=f"{room_in_center // options['rooms_per_floor'] + 1:02d}",
+                            room_no=f"R{room_in_center + 1:03d}",
+                            exam_date_time="2025-12-01 10:00",
+                            roll=roll,
+                        ))
+                    room += 1
+            SeatPlan.objects.bulk_create(seats, batch_size=BATCH_SIZE)
+
+            # bulk_create skips signals, so bump the data versions by hand
+            DataVersion.bump('subcategory')
+            DataVersion.bump('applicant')
+            assign_seats()
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Created {len(posts)} post(s), {len(subcategories)} subcategories, {len(users)} user(s), "
+            f"{len(applicants)} applicant(s) and {len(seats)} seat(s)."
+        ))
+
+    def flush(self):
+        with transaction.atomic():
+            SeatPlan.objects.filter(exam_center__startswith=CENTER_PREFIX).delete()
+            SchoolApplicant.objects.filter(applicant_number__startswith=APPLICANT_NUMBER_PREFIX).delete()
+            User.objects.filter(username__startswith=USERNAME_PREFIX).delete()
+            PortalPost.objects.filter(title__startswith=POST_TITLE_PREFIX).delete()
+            assign_seats()
+        self.stdout.write("Removed earlier synthetic data.")
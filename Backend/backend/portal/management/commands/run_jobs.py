@@ -0,0 +1,43 @@
+import time
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+from django.utils import timezone
+
+from portal.jobs import claim_next_job, run_job
+from portal.models import BackgroundJob
+
+
+class Command(BaseCommand):
+    help = "Run queued background jobs (PDF exports). Polls the job table; no broker needed."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--once', action='store_true',
+                            help="Exit once the queue is empty instead of polling.")
+        parser.add_argument('--poll', type=float, default=2.0,
+                            help="Seconds to wait between polls when the queue is empty.")
+        parser.add_argument('--stale-after', type=int, default=60,
+                            help="Requeue jobs left running for this many minutes (crashed worker).")
+
+    def handle(self, *args, **options):
+        cutoff = timezone.now() - timedelta(minutes=options['stale_after'])
+        requeued = (BackgroundJob.objects
+                    .filter(status=BackgroundJob.STATUS_RUNNING, started_at__lt=cutoff)
+                    .update(status=BackgroundJob.STATUS_QUEUED, started_at=None))
+        if requeued:
+            self.stdout.write(f"Requeued {requeued} stale job(s).")
+
+        while True:
+            close_old_connections()
+            job = claim_next_job()
+            if job is None:
+                if options['once']:
+                    return
+                time.sleep(options['poll'])
+                continue
+
+            self.stdout.write(f"Running {job} ...")
+            started = time.monotonic()
+            run_job(job)
+            self.stdout.write(f"{job} finished in {time.monotonic() - started:.1f}s")
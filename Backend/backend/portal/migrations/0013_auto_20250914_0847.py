@@ -1,48 +1,18 @@
 # Generated by Django 5.2.5 on 2025-09-14 02:47
 
 from django.conf import settings
-from django.db import migrations, models
-import django.db.models.deletion
+from django.db import migrations
 
 
 class Migration(migrations.Migration):
+    # PortalPost, SubCategory and SchoolApplicant.subcategory/user already
+    # exist in the state (0003-0006, 0010), and re-creating them here broke
+    # fresh databases. Kept, as a no-op, because databases that were set up
+    # by hand record it as applied.
 
     dependencies = [
         migrations.swappable_dependency(settings.AUTH_USER_MODEL),
         ('portal', '0012_remove_seatplan_portal_seat_exam_ce_576cba_idx_and_more'),
     ]
 
-    operations = [
-        migrations.CreateModel(
-            name='PortalPost',
-            fields=[
-                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
-                ('title', models.CharField(max_length=200)),
-                ('category', models.CharField(choices=[('admission', 'Admission'), ('job', 'Job')], max_length=50)),
-                ('description', models.TextField()),
-                ('created_at', models.DateTimeField(auto_now_add=True)),
-                ('user', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, to=settings.AUTH_USER_MODEL)),
-            ],
-        ),
-        migrations.CreateModel(
-            name='SubCategory',
-            fields=[
-                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
-                ('custom_id', models.CharField(blank=True, help_text='Enter a unique ID for this job (e.g., JOB-001)', max_length=50, null=True, unique=True, verbose_name='Custom Job ID')),
-                ('name', models.CharField(max_length=100)),
-                ('application_fee', models.DecimalField(blank=True, decimal_places=2, max_digits=10, null=True)),
-                ('post', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='subcategories', to='portal.portalpost')),
-                ('user', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, to=settings.AUTH_USER_MODEL)),
-            ],
-        ),
-        migrations.AddField(
-            model_name='schoolapplicant',
-            name='subcategory',
-            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, to='portal.subcategory'),
-        ),
-        migrations.AddField(
-            model_name='schoolapplicant',
-            name='user',
-            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, to=settings.AUTH_USER_MODEL),
-        ),
-    ]
+    operations = []
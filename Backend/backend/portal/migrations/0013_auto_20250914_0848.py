@@ -1,29 +1,17 @@
 # Generated by Django 5.2.5 on 2025-09-14 02:48
 
-from django.db import migrations, models
+from django.db import migrations
 
 
 class Migration(migrations.Migration):
+    # Meant to swap a category_id column for the category CharField, but no
+    # migration ever added category_id to the state (PortalPost.category is
+    # a CharField since 0003), so RemoveField raised KeyError and the graph
+    # did not load. The column swap on old databases is done by 0849; kept,
+    # as a no-op, because databases record it as applied.
 
     dependencies = [
         ('portal', '0012_remove_seatplan_portal_seat_exam_ce_576cba_idx_and_more'),
     ]
 
-    operations = [
-        # Remove the old category_id foreign key column
-        migrations.RemoveField(
-            model_name='portalpost',
-            name='category_id',
-        ),
-        # Add the new category CharField
-        migrations.AddField(
-            model_name='portalpost',
-            name='category',
-            field=models.CharField(
-                choices=[('admission', 'Admission'), ('job', 'Job')], 
-                max_length=50,
-                default='admission'
-            ),
-            preserve_default=False,
-        ),
-    ]
+    operations = []
@@ -3,36 +3,36 @@
 from django.db import migrations
 
 
+def category_id_to_category(apps, schema_editor):
+    # Only databases created before 0003 was edited have a category_id
+    # column; on every other database (including fresh ones) this is a no-op.
+    connection = schema_editor.connection
+    with connection.cursor() as cursor:
+        columns = {c.name for c in connection.introspection.get_table_description(cursor, 'portal_portalpost')}
+    if 'category_id' not in columns:
+        return
+    if 'category' not in columns:
+        schema_editor.execute(
+            "ALTER TABLE portal_portalpost ADD COLUMN category VARCHAR(50) DEFAULT 'admission'"
+        )
+    schema_editor.execute("""
+        UPDATE portal_portalpost
+        SET category = CASE
+            WHEN category_id = 1 THEN 'admission'
+            WHEN category_id = 2 THEN 'job'
+            ELSE 'admission'
+        END
+    """)
+    schema_editor.execute("ALTER TABLE portal_portalpost DROP COLUMN category_id")
+
+
 class Migration(migrations.Migration):
+    # Database-only: the state already has PortalPost.category (0003).
 
     dependencies = [
         ('portal', '0012_remove_seatplan_portal_seat_exam_ce_576cba_idx_and_more'),
     ]
 
     operations = [
-        migrations.RunSQL(
-            # Forward SQL - Transform category_id to category CharField
-            """
-            ALTER TABLE portal_portalpost 
-            ADD COLUMN category VARCHAR(50) DEFAULT 'admission';
-            
-            UPDATE portal_portalpost 
-            SET category = CASE 
-                WHEN category_id = 1 THEN 'admission'
-                WHEN category_id = 2 THEN 'job'
-                ELSE 'admission'
-            END;
-            
-            ALTER TABLE portal_portalpost 
-            DROP COLUMN IF EXISTS category_id;
-            """,
-            # Reverse SQL - In case we need to rollback
-            """
-            ALTER TABLE portal_portalpost 
-            ADD COLUMN category_id INTEGER;
-            
-            ALTER TABLE portal_portalpost 
-            DROP COLUMN IF EXISTS category;
-            """,
-        ),
+        migrations.RunPython(category_id_to_category, migrations.RunPython.noop),
     ]
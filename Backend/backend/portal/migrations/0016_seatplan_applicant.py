@@ -0,0 +1,50 @@
+# Generated by Django 5.2.18 on 2026-10-18 16:18
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def assign_existing_seats(apps, schema_editor):
+    # Backfill with the pairing portal.seating.assign_seats() uses, frozen here
+    schema_editor.execute("""
+        UPDATE portal_seatplan SET applicant_id = m.applicant_id
+        FROM (
+            SELECT seats.id AS seat_id, apps.id AS applicant_id
+            FROM (
+                SELECT id, UPPER(TRIM(post_code)) AS code,
+                       ROW_NUMBER() OVER (
+                           PARTITION BY UPPER(TRIM(post_code))
+                           ORDER BY exam_center, building, floor, room_no, id
+                       ) AS rn
+                FROM portal_seatplan
+            ) AS seats
+            JOIN (
+                SELECT a.id, UPPER(TRIM(s.custom_id)) AS code,
+                       ROW_NUMBER() OVER (
+                           PARTITION BY UPPER(TRIM(s.custom_id))
+                           ORDER BY a.roll_number, a.id
+                       ) AS rn
+                FROM portal_schoolapplicant a
+                JOIN portal_subcategory s ON s.id = a.subcategory_id
+                WHERE s.custom_id IS NOT NULL
+                  AND a.roll_number IS NOT NULL AND a.roll_number <> ''
+            ) AS apps ON apps.code = seats.code AND apps.rn = seats.rn
+        ) AS m
+        WHERE portal_seatplan.id = m.seat_id
+    """)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('portal', '0015_pdf_cache'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='seatplan',
+            name='applicant',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='seats', to='portal.schoolapplicant'),
+        ),
+        migrations.RunPython(assign_existing_seats, migrations.RunPython.noop),
+    ]
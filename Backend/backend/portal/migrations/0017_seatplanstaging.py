@@ -0,0 +1,30 @@
+# Generated by Django 5.2.18 on 2026-10-18 16:35
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('portal', '0016_seatplan_applicant'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SeatPlanStaging',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('batch', models.CharField(db_index=True, max_length=32)),
+                ('row', models.PositiveIntegerField()),
+                ('post_code', models.CharField(max_length=10)),
+                ('post_name', models.CharField(max_length=1000)),
+                ('exam_center', models.TextField()),
+                ('building', models.CharField(max_length=50)),
+                ('floor', models.CharField(max_length=50)),
+                ('room_no', models.CharField(max_length=50)),
+                ('exam_date_time', models.CharField(max_length=100)),
+                ('roll', models.CharField(blank=True, max_length=20, null=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+        ),
+    ]
@@ -0,0 +1,24 @@
+# Generated by Django 5.2.18 on 2026-10-18 16:40
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('portal', '0018_backgroundjob_seatplan_import'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RollSequence',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('prefix', models.CharField(max_length=3)),
+                ('last_value', models.PositiveBigIntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('subcategory', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='roll_sequence', to='portal.subcategory')),
+            ],
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-18 16:48
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('portal', '0020_applicant_number_sequence'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='seatplan',
+            name='roll',
+            field=models.CharField(blank=True, db_index=True, max_length=20, null=True),
+        ),
+    ]
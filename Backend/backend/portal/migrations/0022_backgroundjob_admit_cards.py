@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-18 16:51
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('portal', '0021_seatplan_roll_index'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='backgroundjob',
+            name='kind',
+            field=models.CharField(choices=[('attendance', 'Attendance sheets'), ('seatplan_import', 'Seat plan import'), ('admit_cards', 'Admit cards')], max_length=30),
+        ),
+    ]
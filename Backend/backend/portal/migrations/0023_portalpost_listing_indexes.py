@@ -0,0 +1,23 @@
+# Generated by Django 5.2.18 on 2026-10-18 16:55
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('portal', '0022_backgroundjob_admit_cards'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='portalpost',
+            index=models.Index(fields=['-created_at', '-id'], name='portalpost_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='portalpost',
+            index=models.Index(fields=['category', '-created_at', '-id'], name='portalpost_category_idx'),
+        ),
+    ]
@@ -0,0 +1,40 @@
+# Generated by Django 5.2.18 on 2026-10-18 18:05
+
+from django.db import migrations, models
+
+
+def merge_by_prefix(apps, schema_editor):
+    # Keep the highest counter of each prefix so no issued roll is reused
+    RollSequence = apps.get_model('portal', 'RollSequence')
+    keep = {}
+    for seq in RollSequence.objects.order_by('-last_value', 'id'):
+        if seq.prefix in keep:
+            seq.delete()
+        else:
+            keep[seq.prefix] = seq
+
+
+def clear_sequences(apps, schema_editor):
+    # Sequences re-seed from the existing rolls on first use
+    apps.get_model('portal', 'RollSequence').objects.all().delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('portal', '0023_portalpost_listing_indexes'),
+    ]
+
+    operations = [
+        migrations.RunPython(merge_by_prefix, migrations.RunPython.noop),
+        migrations.RemoveField(
+            model_name='rollsequence',
+            name='subcategory',
+        ),
+        migrations.AlterField(
+            model_name='rollsequence',
+            name='prefix',
+            field=models.CharField(max_length=3, unique=True),
+        ),
+        migrations.RunPython(migrations.RunPython.noop, clear_sequences),
+    ]
@@ -1,6 +1,7 @@
-from django.db import models
-import random
+from django.db import models, router
+from django.db.models.signals import post_save, pre_save
 from django.contrib.auth.models import User
+from django.utils import timezone
 import uuid
 
 # Admin-posted circulars
@@ -19,6 +20,13 @@ class PortalPost(models.Model):
     description = models.TextField()
     created_at = models.DateTimeField(auto_now_add=True)
 
+    class Meta:
+        # The circular listing pages newest first, optionally by category
+        indexes = [
+            models.Index(fields=['-created_at', '-id'], name='portalpost_created_idx'),
+            models.Index(fields=['category', '-created_at', '-id'], name='portalpost_category_idx'),
+        ]
+
     def __str__(self):
         return self.title
 
@@ -42,6 +50,13 @@ class SubCategory(models.Model):
         return f"{self.name} ({self.post.title})"
 
 
+class ApplicationSubmitted(Exception):
+    """The application was already submitted and can no longer be changed."""
+
+    def __init__(self, message="This application has already been submitted. No further edits allowed."):
+        super().__init__(message)
+
+
 # School application linked to subcategory
 class SchoolApplicant(models.Model):
     GENDER_CHOICES = [
@@ -83,22 +98,60 @@ class SchoolApplicant(models.Model):
 
     def save(self, *args, **kwargs):
         if not self.applicant_number:
-            # Generate a unique six-digit random integer as applicant number
+            # Shuffled sequence number; unique without a lookup per attempt
             self.applicant_number = self.generate_unique_applicant_number()
-        # Prevent updates if is_submit is True, unless setting is_submit to True for the first time
-        if self.pk:
-            orig = SchoolApplicant.objects.get(pk=self.pk)
-            if orig.is_submit and not (not orig.is_submit and self.is_submit):
-                # Only allow if is_submit is being set to True from False
-                raise Exception("This application has already been submitted. No further edits allowed.")
-        super().save(*args, **kwargs)
+        if self._state.adding or args or kwargs.get('force_insert'):
+            super().save(*args, **kwargs)
+            return
+        if not self._update_unsubmitted(kwargs.get('using'), kwargs.get('update_fields')):
+            # Nothing matched: submitted, or really missing (then save() inserts)
+            if SchoolApplicant._base_manager.filter(pk=self.pk).exists():
+                raise ApplicationSubmitted()
+            super().save(*args, **kwargs)
+
+    def _update_unsubmitted(self, using, update_fields):
+        """
+        Write the edit as one UPDATE ... WHERE is_submit = false, so a
+        submitted application is never changed and no SELECT runs first.
+        Sends the same signals as save(); returns whether a row matched.
+        """
+        cls = type(self)
+        using = using or router.db_for_write(cls, instance=self)
+        if update_fields is None:
+            # Like save(): a partially loaded instance writes what it loaded
+            deferred = self.get_deferred_fields()
+            if deferred:
+                update_fields = [f.attname for f in self._meta.concrete_fields if f.attname not in deferred]
+        if update_fields is not None:
+            update_fields = frozenset(update_fields)
+            if not update_fields:
+                return True
+        pre_save.send(sender=cls, instance=self, raw=False, using=using, update_fields=update_fields)
+        values = {
+            field.attname: field.pre_save(self, False)
+            for field in self._meta.concrete_fields
+            if not field.primary_key and (update_fields is None
+                                          or field.name in update_fields or field.attname in update_fields)
+        }
+        if not cls._base_manager.using(using).filter(pk=self.pk, is_submit=False).update(**values):
+            return False
+        self._state.db = using
+        post_save.send(sender=cls, instance=self, created=False, update_fields=update_fields, raw=False, using=using)
+        return True
+
+    def submit(self):
+        """Lock the application against further edits; one conditional UPDATE."""
+        updated = (SchoolApplicant.objects.filter(pk=self.pk, is_submit=False)
+                   .update(is_submit=True, updated_at=timezone.now()))
+        if not updated:
+            raise ApplicationSubmitted()
+        self.is_submit = True
 
     @classmethod
     def generate_unique_applicant_number(cls):
-        while True:
-            number = str(random.randint(1, 999999)).zfill(6)
-            if not cls.objects.filter(applicant_number=number).exists():
-                return number
+        # Imported here because portal.applicant_numbers imports this module
+        from .applicant_numbers import next_applicant_number
+        return next_applicant_number()
 
     def __str__(self):
         return f"{self.student_name} (App#: {self.applicant_number})"
@@ -119,8 +172,150 @@ class SeatPlan(models.Model):
     # start_roll = models.CharField(max_length=20)
     # end_roll = models.CharField(max_length=20)
     exam_date_time = models.CharField(max_length=100) 
-    roll = models.CharField(max_length=20, null=True, blank=True)
+    # Indexed: admit cards look their seat up by roll
+    roll = models.CharField(max_length=20, null=True, blank=True, db_index=True)
      # or DateTimeField if parsed
+    # Who sits here; filled in set-wise by portal.seating.assign_seats()
+    applicant = models.ForeignKey(SchoolApplicant, on_delete=models.SET_NULL, null=True, blank=True, related_name='seats')
+
+    def __str__(self):
+        return f"{self.post_name} - {self.room_no}"
+
+
+# Uploaded seat plan rows waiting for the admin to confirm a re-import diff
+
+class SeatPlanStaging(models.Model):
+    batch = models.CharField(max_length=32, db_index=True)
+    # Row number in the uploaded sheet (1 is the header)
+    row = models.PositiveIntegerField()
+    post_code = models.CharField(max_length=10)
+    post_name = models.CharField(max_length=1000)
+    exam_center = models.TextField()
+    building = models.CharField(max_length=50)
+    floor = models.CharField(max_length=50)
+    room_no = models.CharField(max_length=50)
+    exam_date_time = models.CharField(max_length=100)
+    roll = models.CharField(max_length=20, null=True, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f"{self.batch} row {self.row}"
+
+# Background jobs (PDF exports etc.) picked up by `manage.py run_jobs`
+
+class BackgroundJob(models.Model):
+    KIND_CHOICES = [
+        ('attendance', 'Attendance sheets'),
+        ('seatplan_import', 'Seat plan import'),
+        ('admit_cards', 'Admit cards'),
+    ]
+    STATUS_QUEUED = 'queued'
+    STATUS_RUNNING = 'running'
+    STATUS_DONE = 'done'
+    STATUS_FAILED = 'failed'
+    STATUS_CHOICES = [
+        (STATUS_QUEUED, 'Queued'),
+        (STATUS_RUNNING, 'Running'),
+        (STATUS_DONE, 'Done'),
+        (STATUS_FAILED, 'Failed'),
+    ]
+
+    kind = models.CharField(max_length=30, choices=KIND_CHOICES)
+    params = models.JSONField(default=dict, blank=True)
+    # Hash of kind + normalized params; identical requests share one job
+    dedupe_key = models.CharField(max_length=64, db_index=True)
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default=STATUS_QUEUED, db_index=True)
+
+    # Relative to settings.GENERATED_FILES_ROOT, never under MEDIA_ROOT
+    result_file = models.CharField(max_length=255, blank=True)
+    result_name = models.CharField(max_length=255, blank=True)
+    error = models.TextField(blank=True)
+
+    created_by = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    def __str__(self):
+        return f"{self.get_kind_display()} #{self.pk} ({self.status})"
+
+
+# Cache invalidation counters
+
+class DataVersion(models.Model):
+    """
+    A counter per data set (e.g. 'seatplan', 'applicant') that is bumped
+    whenever rows that feed generated documents change. Signals bump it for
+    model saves/deletes; bulk writes (queryset.update, bulk_create) have to
+    call DataVersion.bump() themselves.
+    """
+    name = models.CharField(max_length=50, unique=True)
+    version = models.PositiveBigIntegerField(default=0)
+
+    def __str__(self):
+        return f"{self.name} v{self.version}"
+
+    @classmethod
+    def bump(cls, name):
+        if not cls.objects.filter(name=name).update(version=models.F('version') + 1):
+            obj, created = cls.objects.get_or_create(name=name, defaults={'version': 1})
+            if not created:
+                cls.objects.filter(name=name).update(version=models.F('version') + 1)
+
+    @classmethod
+    def current(cls, *names):
+        versions = dict(cls.objects.filter(name__in=names).values_list('name', 'version'))
+        return {name: versions.get(name, 0) for name in names}
+
+
+# Roll number counters, so roll generation never scans existing rolls
+
+class RollSequence(models.Model):
+    """
+    The last roll suffix handed out for a roll prefix: the first three
+    characters of a subcategory's custom_id, so JOB-001 and JOB-002 share
+    one. Advanced under a row lock, a block at a time, by
+    portal.rolls.reserve_rolls(). Seeded on first use from the existing
+    rolls with that prefix in every subcategory; delete the row to re-seed
+    after editing rolls by hand.
+    """
+    prefix = models.CharField(max_length=3, unique=True)
+    last_value = models.PositiveBigIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.prefix} @ {self.last_value}"
+
+
+class NumberSequence(models.Model):
+    """
+    A named counter handed out in blocks by portal.applicant_numbers. On
+    PostgreSQL the applicant number allocator uses a real database sequence
+    instead, which (unlike this row) is not rolled back with the caller.
+    """
+    name = models.CharField(max_length=50, unique=True)
+    last_value = models.PositiveBigIntegerField(default=0)
+
+    def __str__(self):
+        return f"{self.name} @ {self.last_value}"
+
+
+# Generated PDFs kept on disk, keyed by filters + data versions
+
+class PdfCacheEntry(models.Model):
+    key = models.CharField(max_length=64, unique=True)
+    kind = models.CharField(max_length=30)
+    params = models.JSONField(default=dict, blank=True)
+    # Relative to settings.PDF_CACHE_ROOT
+    file = models.CharField(max_length=255)
+    size = models.PositiveBigIntegerField(default=0)
+    hits = models.PositiveIntegerField(default=0)
+    created_at = models.DateTimeField(auto_now_add=True)
+    last_used_at = models.DateTimeField(default=timezone.now, db_index=True)
+
+    class Meta:
+        verbose_name = "cached PDF"
+        verbose_name_plural = "cached PDFs"
 
     def __str__(self):
-        return f"{self.post_name} - {self.room_no}"
\ No newline at end of file
+        return f"{self.kind} {self.params} ({self.size // 1024} KB)"
@@ -0,0 +1,15 @@
+# pagination.py
+
+from django.conf import settings
+from rest_framework.pagination import CursorPagination
+
+
+class PortalPostPagination(CursorPagination):
+    """
+    Newest circulars first. The cursor encodes the last created_at seen, so
+    every page is an index range scan however many years of posts pile up.
+    """
+    ordering = ('-created_at', '-id')
+    page_size = settings.POSTS_PAGE_SIZE
+    page_size_query_param = 'page_size'
+    max_page_size = 100
@@ -0,0 +1,136 @@
+import hashlib
+import json
+import os
+import tempfile
+
+from django.conf import settings
+from django.db.models import F, Sum
+from django.utils import timezone
+
+from .attendance import attendance_rooms, iter_attendance, render_attendance, sheet_date
+from .models import DataVersion, PdfCacheEntry
+
+
+# Data sets whose changes invalidate a cached attendance PDF
+ATTENDANCE_VERSIONS = ('seatplan', 'applicant', 'subcategory')
+
+
+def cache_key(kind, params, version_names, date=None):
+    # `date`: for documents that print the day they were rendered on
+    payload = json.dumps({
+        'kind': kind,
+        'params': params,
+        'versions': DataVersion.current(*version_names),
+        'date': date.isoformat() if date else None,
+    }, sort_keys=True)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+def entry_path(entry):
+    return os.path.join(settings.PDF_CACHE_ROOT, entry.file)
+
+
+def lookup(key):
+    """Absolute path of a cached file for `key`, or None on a miss."""
+    entry = PdfCacheEntry.objects.filter(key=key).first()
+    if entry is None:
+        return None
+    path = entry_path(entry)
+    if not os.path.exists(path):
+        entry.delete()
+        return None
+    PdfCacheEntry.objects.filter(pk=entry.pk).update(last_used_at=timezone.now(), hits=F('hits') + 1)
+    return path
+
+
+def store(key, kind, params, tmp_path):
+    """Move a freshly rendered file into the cache and evict if over budget."""
+    filename = f"{kind}_{key}.pdf"
+    path = os.path.join(settings.PDF_CACHE_ROOT, filename)
+    os.replace(tmp_path, path)
+    PdfCacheEntry.objects.update_or_create(key=key, defaults={
+        'kind': kind,
+        'params': params,
+        'file': filename,
+        'size': os.path.getsize(path),
+        'last_used_at': timezone.now(),
+    })
+    evict(keep=key)
+    return path
+
+
+def evict(keep=None, max_bytes=None):
+    """Drop least-recently-used entries until the cache fits in `max_bytes`."""
+    if max_bytes is None:
+        max_bytes = settings.PDF_CACHE_MAX_BYTES
+    total = PdfCacheEntry.objects.aggregate(total=Sum('size'))['total'] or 0
+    if total <= max_bytes:
+        return
+    for entry in PdfCacheEntry.objects.exclude(key=keep).order_by('last_used_at'):
+        total -= entry.size
+        entry.delete()
+        if total <= max_bytes:
+            break
+
+
+def attendance_pdf(filters):
+    """
+    Path of the attendance PDF for normalized `filters`, rendering and caching
+    it on a miss. Returns None when no SeatPlan row matches the filters.
+    """
+    key = cache_key('attendance', filters, ATTENDANCE_VERSIONS, date=sheet_date())
+    path = lookup(key)
+    if path:
+        return path
+
+    rooms = attendance_rooms(filters)
+    if rooms is None:
+        return None
+    os.makedirs(settings.PDF_CACHE_ROOT, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(suffix='.part', dir=settings.PDF_CACHE_ROOT)
+    try:
+        with os.fdopen(fd, 'wb') as fh:
+            render_attendance(rooms, fh)
+        return store(key, 'attendance', filters, tmp_path)
+    except Exception:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+def _stream_into_cache(key, kind, params, chunks):
+    """
+    Yield `chunks` while writing them to a .part file in the cache, which is
+    stored under `key` once the last chunk is out. A download abandoned
+    midway closes this generator, and the partial file is dropped.
+    """
+    os.makedirs(settings.PDF_CACHE_ROOT, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(suffix='.part', dir=settings.PDF_CACHE_ROOT)
+    try:
+        with os.fdopen(fd, 'wb') as fh:
+            for chunk in chunks:
+                fh.write(chunk)
+                yield chunk
+        store(key, kind, params, tmp_path)
+    finally:
+        chunks.close()
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+
+def open_attendance_pdf(filters):
+    """
+    The attendance PDF for normalized `filters`, for a response to send: the
+    cached file opened for reading, or on a miss an iterator that yields each
+    room's pages as they are rendered and caches the document on the way
+    (see _stream_into_cache). None when no SeatPlan row matches the filters.
+    """
+    key = cache_key('attendance', filters, ATTENDANCE_VERSIONS, date=sheet_date())
+    path = lookup(key)
+    if path:
+        return open(path, 'rb')
+
+    rooms = attendance_rooms(filters)
+    if rooms is None:
+        return None
+    return _stream_into_cache(key, 'attendance', filters, iter_attendance(rooms))
@@ -0,0 +1,155 @@
+import hashlib
+import re
+from array import array
+from collections import OrderedDict
+from io import BytesIO
+
+# pypdf releases the concatenator is known to work with: it copies streams
+# through StreamObject._data (the still-encoded bytes), which has no public
+# accessor. Outside this range, or without pypdf, callers fall back to
+# drawing everything on one canvas and the system check portal.W001 warns.
+PYPDF_VERSIONS = ((3, 0), (7, 0))
+PYPDF_REQUIREMENT = "pypdf>=3.0,<7.0"
+
+try:
+    import pypdf
+    from pypdf import PdfReader
+    from pypdf.generic import ArrayObject, DictionaryObject, IndirectObject, NameObject, StreamObject
+except ImportError:
+    pypdf = PdfReader = None
+    PYPDF_PROBLEM = "pypdf is not installed"
+else:
+    _version = tuple(int(part) for part in re.match(r'(\d+)\.(\d+)', pypdf.__version__).groups())
+    if PYPDF_VERSIONS[0] <= _version < PYPDF_VERSIONS[1]:
+        PYPDF_PROBLEM = None
+    else:
+        PdfReader = None
+        PYPDF_PROBLEM = f"pypdf {pypdf.__version__} is not supported"
+
+
+# Written last, but referenced by every page, so their ids are fixed
+PAGES_ID = 1
+CATALOG_ID = 2
+
+# Digests of recently written objects. Parts repeat the same fonts and form
+# XObjects, so a small window catches them while memory stays bounded.
+SHARED_OBJECTS = 512
+
+
+def _ref(idnum):
+    # A reference into the output document; writes as "<idnum> 0 R"
+    return IndirectObject(idnum, 0, None)
+
+
+class PdfConcatenator:
+    """
+    Joins small PDFs (one per room, or per chunk of cards) into one document,
+    writing every object to `fileobj` as soon as its part is added. Only the
+    byte offset of each object, the page ids and a bounded window of object
+    digests are kept, so memory stays flat however many parts go in;
+    `fileobj` only needs write().
+
+    Objects are copied as they are, compressed streams included, with their
+    references renumbered. An object is written after the objects it refers
+    to, so one identical to a recent object (the fonts and forms every part
+    repeats) is not written again but pointed at the earlier copy.
+    """
+
+    def __init__(self, fileobj):
+        self.fileobj = fileobj
+        self.position = 0
+        # offsets[n] is where object n starts
+        self.offsets = array('Q', [0, 0, 0])
+        self.page_ids = array('Q')
+        self._shared = OrderedDict()
+        self._write(b"%PDF-1.4\n%\x93\x8c\x8b\x9e\n")
+
+    def _write(self, data):
+        self.fileobj.write(data)
+        self.position += len(data)
+
+    def _reserve(self):
+        self.offsets.append(0)
+        return len(self.offsets) - 1
+
+    def _copy(self, obj, ids):
+        # Rebuild containers with renumbered references; leaves are shared
+        if isinstance(obj, IndirectObject):
+            return _ref(self._emit(obj, ids))
+        if isinstance(obj, StreamObject):
+            copy = StreamObject()
+            copy.update({key: self._copy(value, ids) for key, value in obj.items()})
+            # The still-encoded bytes (see PYPDF_VERSIONS); get_data() would
+            # decompress them
+            copy.set_data(obj._data)
+            return copy
+        if isinstance(obj, DictionaryObject):
+            return DictionaryObject({key: self._copy(value, ids) for key, value in obj.items()})
+        if isinstance(obj, ArrayObject):
+            return ArrayObject(self._copy(value, ids) for value in obj)
+        return obj
+
+    def _emit(self, ref, ids, page=False):
+        """Write the object `ref` points at (children first); returns its output id."""
+        if ref.idnum in ids:
+            if ids[ref.idnum] is None:
+                # A reference cycle: give the object its id now, dedupe it never
+                ids[ref.idnum] = self._reserve()
+            return ids[ref.idnum]
+        ids[ref.idnum] = None
+        obj = ref.get_object()
+        if page:
+            # Hang the page off our page tree, not the part's
+            obj = DictionaryObject({key: value for key, value in obj.items() if key != '/Parent'})
+        copy = self._copy(obj, ids)
+        if page:
+            copy[NameObject('/Parent')] = _ref(PAGES_ID)
+
+        body = BytesIO()
+        copy.write_to_stream(body)
+        body = body.getvalue()
+        idnum = ids[ref.idnum]
+        digest = hashlib.sha1(body).digest()
+        if idnum is None and not page and digest in self._shared:
+            self._shared.move_to_end(digest)
+            ids[ref.idnum] = self._shared[digest]
+            return ids[ref.idnum]
+        if idnum is None:
+            idnum = ids[ref.idnum] = self._reserve()
+        self.offsets[idnum] = self.position
+        self._write(b"%d 0 obj\n%s\nendobj\n" % (idnum, body))
+        self._shared[digest] = idnum
+        if len(self._shared) > SHARED_OBJECTS:
+            self._shared.popitem(last=False)
+        return idnum
+
+    def add(self, source):
+        """Append every page of the PDF at `source`, a path or binary file."""
+        ids = {}
+        # Parsed objects point back at their reader; closing it clears its
+        # caches, breaking the cycle so they are freed without waiting for gc
+        with PdfReader(source) as reader:
+            for page in reader.pages:
+                self.page_ids.append(self._emit(page.indirect_reference, ids, page=True))
+
+    def close(self):
+        """Write the page tree, catalog, cross-reference table and trailer."""
+        kids = b" ".join(b"%d 0 R" % n for n in self.page_ids)
+        for idnum, body in (
+            (PAGES_ID, b"<< /Type /Pages /Count %d /Kids [ %s ] >>" % (len(self.page_ids), kids)),
+            (CATALOG_ID, b"<< /Type /Catalog /Pages %d 0 R >>" % PAGES_ID),
+        ):
+            self.offsets[idnum] = self.position
+            self._write(b"%d 0 obj\n%s\nendobj\n" % (idnum, body))
+
+        xref = self.position
+        out = BytesIO()
+        out.write(b"xref\n0 %d\n0000000000 65535 f \n" % len(self.offsets))
+        for offset in self.offsets[1:]:
+            out.write(b"%010d 00000 n \n" % offset)
+            if out.tell() > 1 << 16:
+                self._write(out.getvalue())
+                out = BytesIO()
+        out.write(b"trailer\n<< /Size %d /Root %d 0 R >>\nstartxref\n%d\n%%%%EOF\n"
+                  % (len(self.offsets), CATALOG_ID, xref))
+        self._write(out.getvalue())
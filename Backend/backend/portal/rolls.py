@@ -0,0 +1,220 @@
+import re
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.db import DatabaseError, connection, transaction
+from django.db.models import BigIntegerField, Max
+from django.db.models.functions import Cast, Substr
+
+from .models import DataVersion, RollSequence, SchoolApplicant, SubCategory
+from .seating import assign_seats
+
+
+# Rolls are <first 3 chars of custom_id, upper-cased><zero-padded sequence>
+ROLL_LENGTH = 8
+PREFIX_LENGTH = 3
+
+# Rows per bulk_update statement on backends without window functions
+BULK_UPDATE_BATCH = 2000
+
+
+class RollNumberError(Exception):
+    """Rolls cannot be generated for this subcategory (e.g. bad custom_id)."""
+
+
+class RollResult:
+    def __init__(self, prefix, width, assigned, skipped):
+        self.prefix = prefix
+        self.width = width
+        self.assigned = assigned
+        # Applicants left without a roll because the sequence ran out
+        self.skipped = skipped
+
+
+class SubcategoryRolls:
+    """Outcome of one subcategory in generate_all_rolls()."""
+
+    def __init__(self, subcategory, result=None, error=None, seconds=0.0):
+        self.subcategory = subcategory
+        self.result = result        # RollResult, or None when it failed
+        self.error = error          # message, also set when the sequence ran out
+        self.seconds = seconds
+
+
+def roll_prefix(subcategory):
+    """The roll prefix of a subcategory; subcategories may share one."""
+    return str(subcategory.custom_id or '')[:PREFIX_LENGTH].upper()
+
+
+def roll_format(subcategory):
+    """(prefix, width) of the rolls generated for a subcategory."""
+    prefix = roll_prefix(subcategory)
+    if len(prefix) < PREFIX_LENGTH:
+        raise RollNumberError("Custom ID must be at least 3 characters long.")
+    width = ROLL_LENGTH - len(prefix)
+    if width <= 0:
+        raise RollNumberError("Custom ID is too long for 8-digit rolls.")
+    return prefix, width
+
+
+def max_suffix(prefix):
+    """Largest numeric suffix among all <prefix><digits> rolls, or 0."""
+    return (SchoolApplicant.objects
+            .filter(roll_number__regex=rf'^{re.escape(prefix)}[0-9]+$')
+            .aggregate(n=Max(Cast(Substr('roll_number', len(prefix) + 1), BigIntegerField())))['n']) or 0
+
+
+def _supports_set_update():
+    # UPDATE ... FROM with a window function: PostgreSQL, and SQLite >= 3.33
+    if connection.vendor == 'postgresql':
+        return True
+    if connection.vendor == 'sqlite':
+        from django.db.backends.sqlite3.base import Database
+        return Database.sqlite_version_info >= (3, 33, 0)
+    return False
+
+
+def _assign_rolls_sql(subcategory_id, prefix, width, start, limit):
+    app = SchoolApplicant._meta.db_table
+    # 10**width + n has exactly width + 1 digits for n < 10**width, so
+    # dropping its leading "1" zero-pads n without LPAD (missing in SQLite).
+    sql = f"""
+        UPDATE {app} SET roll_number = m.roll
+        FROM (
+            SELECT id, %s || SUBSTR(CAST(%s + rn AS TEXT), 2) AS roll
+            FROM (
+                SELECT id, ROW_NUMBER() OVER (ORDER BY id) AS rn
+                FROM {app}
+                WHERE subcategory_id = %s AND roll_number IS NULL
+            ) AS numbered
+            WHERE rn <= %s
+        ) AS m
+        WHERE {app}.id = m.id AND {app}.roll_number IS NULL
+    """
+    return sql, [prefix, 10 ** width + start, subcategory_id, limit]
+
+
+def _assign_rolls_bulk(subcategory, prefix, width, start, limit):
+    pending = (SchoolApplicant.objects
+               .filter(subcategory=subcategory, roll_number__isnull=True)
+               .order_by('id').values_list('id', flat=True)[:limit])
+    apps = [SchoolApplicant(pk=pk, roll_number=f"{prefix}{start + n:0{width}d}")
+            for n, pk in enumerate(pending, start=1)]
+    SchoolApplicant.objects.bulk_update(apps, ['roll_number'], batch_size=BULK_UPDATE_BATCH)
+    return len(apps)
+
+
+def _locked_sequence(prefix):
+    """The prefix's RollSequence, locked until the transaction ends."""
+    seq = RollSequence.objects.select_for_update().filter(prefix=prefix).first()
+    if seq is None:
+        RollSequence.objects.get_or_create(prefix=prefix, defaults={'last_value': max_suffix(prefix)})
+        seq = RollSequence.objects.select_for_update().get(prefix=prefix)
+    return seq
+
+
+def _advance(seq, width, count):
+    start = seq.last_value
+    granted = min(count, max(0, 10 ** width - 1 - start))
+    seq.last_value = start + granted
+    seq.save(update_fields=['last_value', 'updated_at'])
+    return start, granted
+
+
+def reserve_rolls(subcategory, count):
+    """
+    Take a block of up to `count` roll suffixes for the subcategory's prefix.
+    Returns (start, granted): suffixes start + 1 .. start + granted are the
+    caller's. Call inside a transaction; concurrent callers for the same
+    prefix wait for it to end.
+    """
+    prefix, width = roll_format(subcategory)
+    return _advance(_locked_sequence(prefix), width, count)
+
+
+def generate_rolls(subcategory, reseat=True):
+    """
+    Give every applicant of the subcategory without a roll the next roll
+    number, in id order, taking one block of suffixes from the RollSequence
+    of its prefix (shared with other subcategories whose custom_id starts
+    the same way, so no roll is handed out twice).
+    The rolls are written by one set-based UPDATE (bulk_update in batches
+    where the backend lacks UPDATE ... FROM with window functions). Seats
+    are re-assigned afterwards when anything changed, unless `reseat` is
+    False and the caller does it once for several subcategories.
+    """
+    prefix, width = roll_format(subcategory)
+    with transaction.atomic():
+        # Count only once the sequence is ours, so a run that waited on the
+        # lock does not reserve rolls for applicants the other run numbered.
+        seq = _locked_sequence(prefix)
+        pending = SchoolApplicant.objects.filter(subcategory=subcategory, roll_number__isnull=True).count()
+        start, limit = _advance(seq, width, pending)
+        assigned = 0
+        if limit:
+            if _supports_set_update():
+                with connection.cursor() as cursor:
+                    cursor.execute(*_assign_rolls_sql(subcategory.pk, prefix, width, start, limit))
+                    assigned = cursor.rowcount
+            else:
+                assigned = _assign_rolls_bulk(subcategory, prefix, width, start, limit)
+            if assigned < limit:
+                # Rows went away since the count; hand the unused rolls back
+                seq.last_value = start + assigned
+                seq.save(update_fields=['last_value', 'updated_at'])
+        if assigned and reseat:
+            DataVersion.bump('applicant')
+            assign_seats([subcategory.custom_id])
+    return RollResult(prefix, width, assigned, pending - assigned)
+
+
+def _number(subcategory):
+    started = time.perf_counter()
+    try:
+        result = generate_rolls(subcategory, reseat=False)
+    except (RollNumberError, DatabaseError) as exc:
+        # Reported per subcategory; the others still get their rolls
+        return SubcategoryRolls(subcategory, error=str(exc), seconds=time.perf_counter() - started)
+    error = None
+    if result.skipped:
+        error = f"Reached maximum rolls ({10 ** result.width}) for prefix {result.prefix}."
+    return SubcategoryRolls(subcategory, result, error, time.perf_counter() - started)
+
+
+def _number_in_thread(subcategory):
+    try:
+        return _number(subcategory)
+    finally:
+        # Each pool thread opened its own connection; do not leak it
+        connection.close()
+
+
+def generate_all_rolls(workers=None):
+    """
+    generate_rolls() for every subcategory with a custom_id. They are
+    numbered in parallel, each worker thread holding one DB connection;
+    subcategories sharing a prefix take turns on its sequence row. Seats are
+    re-assigned once at the end.
+    Running it again only numbers applicants who arrived in between.
+    Returns a SubcategoryRolls per subcategory, in id order.
+    """
+    subcategories = list(SubCategory.objects.filter(custom_id__isnull=False).order_by('id'))
+    if workers is None:
+        workers = settings.ROLL_GENERATION_WORKERS
+    # SQLite allows a single writer, and pool threads could not see (and
+    # would wait on) rows locked by a transaction the caller has open
+    if connection.vendor == 'sqlite' or connection.in_atomic_block:
+        workers = 1
+    workers = max(1, min(workers, len(subcategories) or 1))
+
+    if workers == 1:
+        outcomes = [_number(subcategory) for subcategory in subcategories]
+    else:
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            outcomes = list(pool.map(_number_in_thread, subcategories))
+
+    if any(o.result and o.result.assigned for o in outcomes):
+        DataVersion.bump('applicant')
+        assign_seats()
+    return outcomes
@@ -0,0 +1,111 @@
+import threading
+
+from django.db import connection, transaction
+
+from .models import DataVersion, SchoolApplicant, SeatPlan, SubCategory
+
+
+def post_code_key(code):
+    """How seats and subcategories are matched: trimmed, upper-cased."""
+    return str(code).strip().upper()
+
+
+def _scope(column, codes):
+    # "" for the whole table, else an IN list over the normalised column
+    if codes is None:
+        return '', []
+    return f"AND UPPER(TRIM({column})) IN ({', '.join(['%s'] * len(codes))})", list(codes)
+
+
+def _assign_seats_sql(codes=None):
+    seat_scope, seat_params = _scope('post_code', codes)
+    app_scope, app_params = _scope('s.custom_id', codes)
+    seat = SeatPlan._meta.db_table
+    app = SchoolApplicant._meta.db_table
+    sub = SubCategory._meta.db_table
+    # Seats of a post_code, in room order, are paired with the applicants of
+    # the subcategory whose custom_id equals that code, in roll order.
+    sql = f"""
+        UPDATE {seat} SET applicant_id = m.applicant_id
+        FROM (
+            SELECT seats.id AS seat_id, apps.id AS applicant_id
+            FROM (
+                SELECT id, UPPER(TRIM(post_code)) AS code,
+                       ROW_NUMBER() OVER (
+                           PARTITION BY UPPER(TRIM(post_code))
+                           ORDER BY exam_center, building, floor, room_no, id
+                       ) AS rn
+                FROM {seat}
+                WHERE 1 = 1 {seat_scope}
+            ) AS seats
+            JOIN (
+                SELECT a.id, UPPER(TRIM(s.custom_id)) AS code,
+                       ROW_NUMBER() OVER (
+                           PARTITION BY UPPER(TRIM(s.custom_id))
+                           ORDER BY a.roll_number, a.id
+                       ) AS rn
+                FROM {app} a
+                JOIN {sub} s ON s.id = a.subcategory_id
+                WHERE s.custom_id IS NOT NULL
+                  AND a.roll_number IS NOT NULL AND a.roll_number <> ''
+                  {app_scope}
+            ) AS apps ON apps.code = seats.code AND apps.rn = seats.rn
+        ) AS m
+        WHERE {seat}.id = m.seat_id
+    """
+    return sql, seat_params + app_params
+
+
+def assign_seats(post_codes=None):
+    """
+    Work out which applicant sits in which seat and store it on
+    SeatPlan.applicant, using two set-based statements. Call it whenever the
+    seat plan or the roll numbers change; renders then simply join.
+    `post_codes` limits the work to those codes' seats, which are all a
+    change to one seat or applicant can move.
+    Returns the number of seats that got an applicant.
+    """
+    codes = None
+    if post_codes is not None:
+        codes = sorted({post_code_key(code) for code in post_codes if code})
+        if not codes:
+            return 0
+    seat = SeatPlan._meta.db_table
+    scope, params = _scope('post_code', codes)
+    with transaction.atomic(), connection.cursor() as cursor:
+        cursor.execute(f"UPDATE {seat} SET applicant_id = NULL WHERE applicant_id IS NOT NULL {scope}", params)
+        cursor.execute(*_assign_seats_sql(codes))
+        assigned = cursor.rowcount
+    DataVersion.bump('seatplan')
+    return assigned
+
+
+_pending = threading.local()
+
+
+class _Reseat:
+    def __init__(self, codes):
+        self.codes = set(codes)
+
+    def __call__(self):
+        if getattr(_pending, 'reseat', None) is self:
+            _pending.reseat = None
+        assign_seats(self.codes)
+
+
+def reseat_on_commit(post_codes):
+    """
+    assign_seats(post_codes) once the current transaction commits (at once
+    outside one). Calls made before that share one run, so deleting a
+    subcategory with thousands of applicants re-seats its code only once.
+    """
+    codes = {post_code_key(code) for code in post_codes if code}
+    if not codes:
+        return
+    reseat = getattr(_pending, 'reseat', None)
+    # Still queued: not yet run, nor dropped by a rollback
+    if reseat is not None and any(func is reseat for _, func, _ in connection.run_on_commit):
+        reseat.codes |= codes
+        return
+    _pending.reseat = _Reseat(codes)
+    transaction.on_commit(_pending.reseat)
@@ -0,0 +1,405 @@
+import csv
+import io
+import os
+import uuid
+from datetime import timedelta
+
+import openpyxl
+import pandas as pd
+from django.conf import settings
+from django.db import connection, transaction
+from django.utils import timezone
+
+from .models import SeatPlan, SeatPlanStaging
+from .seating import assign_seats
+
+
+# Columns an uploaded seat plan must have, in SeatPlan field order
+REQUIRED_COLUMNS = ['post_code', 'post_name', 'exam_center', 'building', 'floor', 'room_no', 'roll', 'exam_date_time']
+
+# A seat is useless without these; the rest may be left blank in the sheet
+NON_EMPTY_COLUMNS = ['post_code', 'exam_center', 'room_no']
+
+
+class SeatPlanImportError(Exception):
+    """The uploaded sheet cannot be imported at all (e.g. columns missing)."""
+
+
+class ImportResult:
+    def __init__(self, inserted, rejected):
+        self.inserted = inserted
+        # DataFrame of rejected rows: sheet row number, the row values and the reason
+        self.rejected = rejected
+
+
+def _as_text(series):
+    """Column values as stripped strings, with empty cells as ''."""
+    text = series.astype('string')
+    if pd.api.types.is_float_dtype(series):
+        # Whole-number columns with gaps come out of Excel as floats (101.0)
+        text = text.str.replace(r'\.0$', '', regex=True)
+    return text.fillna('').str.strip()
+
+
+def normalize_frame(df):
+    """
+    Normalize column names, check the required columns are present and turn
+    every value into the text SeatPlan stores. The readers index rows by
+    their position below the header, blank rows included, so index + 2 is
+    the sheet row number (1 is the header); it is kept as the index so
+    rejected rows can be reported the way staff see them in Excel.
+    """
+    df.columns = df.columns.astype(str).str.strip().str.lower()
+    df = df.loc[:, ~df.columns.duplicated()]
+    missing = [col for col in REQUIRED_COLUMNS if col not in df.columns]
+    if missing:
+        raise SeatPlanImportError(f"Missing columns: {', '.join(missing)}")
+    frame = pd.DataFrame({col: _as_text(df[col]) for col in REQUIRED_COLUMNS})
+    frame.index = pd.Index(df.index + 2, name='row')
+    return frame
+
+
+def validate_frame(frame):
+    """Split a normalized frame into (valid rows, rejected rows with a reason)."""
+    reasons = pd.Series('', index=frame.index, dtype='string')
+    for col in NON_EMPTY_COLUMNS:
+        reasons = reasons.mask((frame[col] == '') & (reasons == ''), f"{col} is empty")
+    for col in REQUIRED_COLUMNS:
+        max_length = SeatPlan._meta.get_field(col).max_length
+        if max_length:
+            too_long = frame[col].str.len() > max_length
+            reasons = reasons.mask(too_long & (reasons == ''), f"{col} is longer than {max_length} characters")
+    bad = reasons != ''
+    rejected = frame[bad].assign(reason=reasons[bad]).reset_index()
+    return frame[~bad], rejected
+
+
+def _columns_sql(model, names):
+    quote = connection.ops.quote_name
+    table = quote(model._meta.db_table)
+    columns = ', '.join(quote(model._meta.get_field(name).column) for name in names)
+    return table, columns
+
+
+def _nullable(model, names):
+    return [i for i, name in enumerate(names) if model._meta.get_field(name).null]
+
+
+def _copy_rows(model, frame):
+    """PostgreSQL fast path: stream the rows in with COPY instead of INSERTs."""
+    names = list(frame.columns)
+    table, columns = _columns_sql(model, names)
+    nullable = ', '.join(connection.ops.quote_name(model._meta.get_field(names[i]).column)
+                         for i in _nullable(model, names))
+    # Every field is quoted so blanks stay '' in NOT NULL columns; only
+    # blanks in nullable columns (roll) are turned back into NULL.
+    options = f"FORMAT csv, FORCE_NULL ({nullable})" if nullable else "FORMAT csv"
+    sql = f"COPY {table} ({columns}) FROM STDIN WITH ({options})"
+    buf = io.StringIO()
+    csv.writer(buf, quoting=csv.QUOTE_ALL).writerows(frame.itertuples(index=False, name=None))
+    buf.seek(0)
+    with connection.cursor() as cursor:
+        raw = cursor.cursor
+        if hasattr(raw, 'copy_expert'):  # psycopg2
+            raw.copy_expert(sql, buf)
+        else:  # psycopg 3
+            with raw.copy(sql) as copy:
+                copy.write(buf.getvalue())
+
+
+def _insert_rows(model, frame):
+    """
+    Other backends: one prepared INSERT run for every row of the batch.
+    Building model instances for bulk_create costs more than the insert
+    itself here, and the values are already validated plain strings.
+    """
+    names = list(frame.columns)
+    table, columns = _columns_sql(model, names)
+    placeholders = ', '.join(['%s'] * len(names))
+    nullable = _nullable(model, names)
+    rows = frame.itertuples(index=False, name=None)
+    if nullable:
+        rows = ([None if i in nullable and value == '' else value for i, value in enumerate(row)] for row in rows)
+    with connection.cursor() as cursor:
+        cursor.executemany(f"INSERT INTO {table} ({columns}) VALUES ({placeholders})", list(rows))
+
+
+def insert_rows(frame, batch_size=None, model=SeatPlan):
+    """
+    Insert validated rows `batch_size` at a time, with COPY on PostgreSQL and
+    batched INSERTs elsewhere. The frame's columns are the model fields to
+    fill. Call inside a transaction.
+    """
+    if frame.empty:
+        return 0
+    if batch_size is None:
+        batch_size = settings.SEATPLAN_IMPORT_BATCH_SIZE
+    for start in range(0, len(frame), batch_size):
+        batch = frame.iloc[start:start + batch_size]
+        if connection.vendor == 'postgresql':
+            _copy_rows(model, batch)
+        else:
+            _insert_rows(model, batch)
+    return len(frame)
+
+
+def _excel_chunks(fileobj, chunk_size):
+    """Stream an .xlsx sheet in DataFrames of `chunk_size` rows (read-only mode)."""
+    workbook = openpyxl.load_workbook(fileobj, read_only=True, data_only=True)
+    try:
+        rows = workbook.active.iter_rows(values_only=True)
+        header = [str(h) if h is not None else '' for h in next(rows, ())]
+        width = len(header)
+        chunk, positions = [], []
+        yielded = False
+        for position, row in enumerate(rows):
+            if all(value is None for value in row):
+                continue
+            chunk.append(tuple(row[:width]) + (None,) * (width - len(row)))
+            positions.append(position)
+            if len(chunk) >= chunk_size:
+                yield pd.DataFrame(chunk, columns=header, index=positions).infer_objects()
+                chunk, positions = [], []
+                yielded = True
+        if chunk or not yielded:
+            # A sheet without data rows still gets its columns checked
+            yield pd.DataFrame(chunk, columns=header, index=positions).infer_objects()
+    finally:
+        workbook.close()
+
+
+def _csv_chunks(fileobj, chunk_size):
+    # Everything is read as text, so there is no type guessing to undo.
+    # Blank lines are read as empty rows, so the running index counts them
+    # and row numbers stay true, and only then dropped.
+    reader = pd.read_csv(
+        fileobj, chunksize=chunk_size, dtype=str, encoding='utf-8-sig',
+        keep_default_na=False, na_values=[''], skip_blank_lines=False,
+    )
+    return (chunk.dropna(how='all') for chunk in reader)
+
+
+def read_chunks(uploaded, chunk_size=None):
+    """
+    Yield the uploaded seat plan as DataFrames of at most `chunk_size` rows.
+    .csv is read with pandas' chunked reader and .xlsx/.xlsm with openpyxl in
+    read-only mode, so memory does not grow with the file. Anything else
+    (old .xls) falls back to reading the whole sheet with pandas.
+    """
+    if chunk_size is None:
+        chunk_size = settings.SEATPLAN_IMPORT_BATCH_SIZE
+    ext = os.path.splitext(getattr(uploaded, 'name', '') or '')[1].lower()
+    if ext == '.csv':
+        try:
+            return _csv_chunks(uploaded, chunk_size)
+        except pd.errors.EmptyDataError:
+            raise SeatPlanImportError("The uploaded file is empty.")
+    if ext in ('.xlsx', '.xlsm'):
+        return _excel_chunks(uploaded, chunk_size)
+    return iter([pd.read_excel(uploaded).dropna(how='all')])
+
+
+def _validated(frames, rejected, counts):
+    """
+    Yield the valid rows of every chunk; rejected rows are appended to
+    `rejected` and the parsed/validated/rejected totals kept in `counts`.
+    """
+    for df in frames:
+        frame, bad = validate_frame(normalize_frame(df))
+        counts['parsed'] += len(df)
+        counts['validated'] += len(frame)
+        counts['rejected'] += len(bad)
+        if len(bad):
+            rejected.append(bad)
+        yield frame
+
+
+def _new_counts():
+    return {'parsed': 0, 'validated': 0, 'inserted': 0, 'rejected': 0}
+
+
+def _rejected_frame(parts):
+    if parts:
+        return pd.concat(parts, ignore_index=True)
+    return pd.DataFrame(columns=['row'] + REQUIRED_COLUMNS + ['reason'])
+
+
+def import_frames(frames, batch_size=None, progress=None):
+    """
+    Validate and insert seat plan chunks in one transaction, then re-run the
+    seat assignment. Rows failing validation are skipped and returned in
+    ImportResult.rejected; a missing column or a database error rolls the
+    whole import back. `progress`, if given, is called with the running
+    counts (parsed, validated, inserted, rejected) after every chunk.
+    """
+    counts = _new_counts()
+    rejected = []
+    with transaction.atomic():
+        for frame in _validated(frames, rejected, counts):
+            counts['inserted'] += insert_rows(frame, batch_size)
+            if progress:
+                progress(counts)
+        # bulk inserts skip the post_save signals; assign_seats bumps the version
+        assign_seats()
+    return ImportResult(counts['inserted'], _rejected_frame(rejected))
+
+
+def import_seatplan(df, batch_size=None):
+    """Import a seat plan already loaded into one DataFrame."""
+    return import_frames([df], batch_size)
+
+
+def import_seatplan_file(uploaded, batch_size=None, progress=None):
+    """Import an uploaded .xlsx/.xls/.csv seat plan chunk by chunk."""
+    return import_frames(read_chunks(uploaded, batch_size), batch_size, progress)
+
+
+# --- Re-import: stage the upload, diff it against the seat plan, apply ---
+
+# A seat is its room plus its position in that room (k-th row of the room,
+# in sheet order for the upload and id order for existing seats).
+ROOM_KEY = ['post_code', 'exam_center', 'building', 'floor', 'room_no']
+SEAT_KEY = ROOM_KEY + ['seat']
+
+# Values a re-upload may change on a matched seat
+DIFF_COLUMNS = ['post_name', 'roll', 'exam_date_time']
+
+# Unconfirmed uploads older than this are dropped on the next upload
+STAGING_MAX_AGE = timedelta(days=1)
+
+
+class StageResult:
+    def __init__(self, batch, staged, rejected):
+        self.batch = batch
+        self.staged = staged
+        self.rejected = rejected
+
+
+class SeatPlanDiff:
+    """
+    Changes that make the seat plan match a staged upload, limited to the
+    (post_code, exam_center) pairs present in the upload.
+    """
+
+    def __init__(self, inserts, updates, deletes, unchanged, scopes):
+        self.inserts = inserts      # DataFrame of new rows (REQUIRED_COLUMNS)
+        self.updates = updates      # DataFrame: id, DIFF_COLUMNS and their *_old values
+        self.deletes = deletes      # list of SeatPlan ids
+        self.unchanged = unchanged
+        self.scopes = scopes        # per (post_code, exam_center) counts, for the summary
+
+    @property
+    def is_empty(self):
+        return self.inserts.empty and self.updates.empty and not self.deletes
+
+
+def stage_file(uploaded, batch_size=None, progress=None):
+    """
+    Load an upload into SeatPlanStaging under a new batch id. SeatPlan is not
+    touched until apply_staged() is called for the batch.
+    """
+    SeatPlanStaging.objects.filter(created_at__lt=timezone.now() - STAGING_MAX_AGE).delete()
+    batch = uuid.uuid4().hex
+    created_at = connection.ops.adapt_datetimefield_value(timezone.now())
+    counts = _new_counts()
+    rejected = []
+    with transaction.atomic():
+        for frame in _validated(read_chunks(uploaded, batch_size), rejected, counts):
+            rows = frame.reset_index().assign(batch=batch, created_at=created_at)
+            counts['inserted'] += insert_rows(rows, batch_size, model=SeatPlanStaging)
+            if progress:
+                progress(counts)
+    return StageResult(batch, counts['inserted'], _rejected_frame(rejected))
+
+
+def discard_staged(batch):
+    SeatPlanStaging.objects.filter(batch=batch).delete()
+
+
+def _number_seats(df, order):
+    df = df.sort_values(order, kind='stable')
+    df['seat'] = df.groupby(ROOM_KEY, sort=False).cumcount()
+    return df
+
+
+def seatplan_diff(batch):
+    """Diff a staged batch against the current seat plan, or None if the batch is gone."""
+    staged = pd.DataFrame.from_records(
+        SeatPlanStaging.objects.filter(batch=batch).values_list('row', *REQUIRED_COLUMNS),
+        columns=['row'] + REQUIRED_COLUMNS,
+    )
+    if staged.empty:
+        return None
+    scope = staged[['post_code', 'exam_center']].drop_duplicates()
+    existing = pd.DataFrame.from_records(
+        SeatPlan.objects
+        .filter(post_code__in=scope['post_code'].unique().tolist(),
+                exam_center__in=scope['exam_center'].unique().tolist())
+        .values_list('id', *REQUIRED_COLUMNS),
+        columns=['id'] + REQUIRED_COLUMNS,
+    )
+    # post_code__in/exam_center__in is a superset; keep only the uploaded pairs
+    existing = existing.merge(scope, on=['post_code', 'exam_center'])
+    for df in (staged, existing):
+        df['roll'] = df['roll'].fillna('')
+
+    merged = _number_seats(existing, 'id').merge(
+        _number_seats(staged, 'row'), on=SEAT_KEY, how='outer', suffixes=('_old', ''), indicator=True,
+    )
+    added = merged['_merge'] == 'right_only'
+    removed = merged['_merge'] == 'left_only'
+    both = merged['_merge'] == 'both'
+    changed = both & pd.concat([merged[col] != merged[f"{col}_old"] for col in DIFF_COLUMNS], axis=1).any(axis=1)
+
+    merged['change'] = 'unchanged'
+    merged.loc[added, 'change'] = 'insert'
+    merged.loc[removed, 'change'] = 'delete'
+    merged.loc[changed, 'change'] = 'update'
+    counts = (merged.groupby(['post_code', 'exam_center'])['change'].value_counts()
+              .unstack(fill_value=0)
+              .reindex(columns=['insert', 'update', 'delete', 'unchanged'], fill_value=0)
+              .reset_index())
+
+    return SeatPlanDiff(
+        inserts=merged.loc[added].sort_values('row')[REQUIRED_COLUMNS],
+        updates=merged.loc[changed, ['id', *DIFF_COLUMNS, *(f"{c}_old" for c in DIFF_COLUMNS)]]
+        .astype({'id': 'int64'}),
+        deletes=merged.loc[removed, 'id'].astype('int64').tolist(),
+        unchanged=int((both & ~changed).sum()),
+        scopes=counts.to_dict('records'),
+    )
+
+
+def _delete_seats(ids, batch_size):
+    # Raw DELETE: a queryset delete would send post_delete (and bump the
+    # data version) once per seat.
+    table = connection.ops.quote_name(SeatPlan._meta.db_table)
+    with connection.cursor() as cursor:
+        for start in range(0, len(ids), batch_size):
+            chunk = ids[start:start + batch_size]
+            cursor.execute(f"DELETE FROM {table} WHERE id IN ({', '.join(['%s'] * len(chunk))})", chunk)
+
+
+def apply_staged(batch, batch_size=None):
+    """
+    Apply the diff of a staged batch in one transaction and drop the batch.
+    The diff is recomputed here, so changes made since the dry run are
+    taken into account. Returns the applied SeatPlanDiff, or None if the
+    batch no longer exists.
+    """
+    if batch_size is None:
+        batch_size = settings.SEATPLAN_IMPORT_BATCH_SIZE
+    with transaction.atomic():
+        diff = seatplan_diff(batch)
+        if diff is None:
+            return None
+        _delete_seats(diff.deletes, batch_size)
+        SeatPlan.objects.bulk_update(
+            [SeatPlan(id=row.id, post_name=row.post_name, roll=row.roll or None, exam_date_time=row.exam_date_time)
+             for row in diff.updates.itertuples()],
+            DIFF_COLUMNS, batch_size=batch_size,
+        )
+        insert_rows(diff.inserts, batch_size)
+        discard_staged(batch)
+        assign_seats()
+    return diff
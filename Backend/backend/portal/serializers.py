@@ -20,8 +20,24 @@ class PortalPostSerializer(serializers.ModelSerializer):
 
 # serializers.py
 
+from django.db.models import OuterRef, Subquery
+from django.db.models.functions import JSONObject
+
 from .models import SchoolApplicant, SeatPlan
 
+SEAT_PLAN_FIELDS = ('post_code', 'post_name', 'exam_center', 'building', 'floor', 'room_no', 'exam_date_time', 'roll')
+
+
+def with_seat_plan(queryset):
+    """
+    Annotate applicants with their seat (matched on roll, via the index on
+    SeatPlan.roll) as `seat_plan_data`, so AdmitCardSerializer needs no
+    query of its own.
+    """
+    seat = (SeatPlan.objects.filter(roll=OuterRef('roll_number')).order_by('id')
+            .values(data=JSONObject(**{name: name for name in SEAT_PLAN_FIELDS}))[:1])
+    return queryset.annotate(seat_plan_data=Subquery(seat))
+
 class AdmitCardSerializer(serializers.ModelSerializer):
     subcategory_name = serializers.CharField(source='subcategory.name')
     post_title = serializers.CharField(source='subcategory.post.title')
@@ -30,27 +46,17 @@ class AdmitCardSerializer(serializers.ModelSerializer):
     class Meta:
         model = SchoolApplicant
         fields = [
-            'student_name', 'father_name', 'mother_name', 'gender',
+            'subcategory', 'student_name', 'father_name', 'mother_name', 'gender',
             'dob', 'student_class', 'applicant_number', 'roll_number',
             'subcategory_name', 'post_title', 'photo', 'signature',
             'seat_plan'
         ]
 
     def get_seat_plan(self, obj):
-        try:
-            seat = SeatPlan.objects.get(roll=obj.roll_number)
-            return {
-                "post_code": seat.post_code,
-                "post_name": seat.post_name,
-                "exam_center": seat.exam_center,
-                "building": seat.building,
-                "floor": seat.floor,
-                "room_no": seat.room_no,
-                "exam_date_time": seat.exam_date_time,
-                "roll": seat.roll
-            }
-        except SeatPlan.DoesNotExist:
-            return None
+        if hasattr(obj, 'seat_plan_data'):
+            # Loaded with the applicant by with_seat_plan()
+            return obj.seat_plan_data
+        return SeatPlan.objects.filter(roll=obj.roll_number).order_by('id').values(*SEAT_PLAN_FIELDS).first()
 
 
 class SchoolApplicantSerializer(serializers.ModelSerializer):
@@ -113,4 +119,5 @@ class SeatPlanSerializer(serializers.ModelSerializer):
     class Meta:
         model = SeatPlan
         fields = '__all__'
+        read_only_fields = ('applicant',)
 
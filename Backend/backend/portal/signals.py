@@ -0,0 +1,126 @@
+import os
+
+from django.conf import settings
+from django.db.models.signals import post_delete, post_init, post_save
+from django.dispatch import receiver
+
+from .models import DataVersion, PdfCacheEntry, PortalPost, SchoolApplicant, SeatPlan, SubCategory
+from .seating import reseat_on_commit
+from .thumbnails import FIELD_KINDS, delete_thumbnail, thumbnail_path
+
+
+IMAGE_FIELDS = ('photo', 'signature')
+
+# Applicant fields that show up on generated documents; saves that touch
+# nothing else (draft edits of addresses etc.) keep cached PDFs valid.
+RENDERED_FIELDS = ('subcategory_id', 'roll_number', 'student_name') + IMAGE_FIELDS
+
+# Applicant fields that decide who sits where
+SEAT_FIELDS = ('subcategory_id', 'roll_number')
+
+
+def _field_value(instance, field):
+    # Read the raw attribute so deferred fields are not fetched just for this
+    value = instance.__dict__.get(field)
+    return getattr(value, 'name', value) or None
+
+
+def _reseat_subcategories(subcategory_ids):
+    # Seats are keyed by post_code, which is the subcategory's custom_id
+    subcategory_ids = {pk for pk in subcategory_ids if pk}
+    if subcategory_ids:
+        reseat_on_commit(SubCategory.objects.filter(pk__in=subcategory_ids).values_list('custom_id', flat=True))
+
+
+def _has_roll(instance, value):
+    # A deferred roll is unknown, so it may well have held a seat
+    return bool(value) or 'roll_number' not in instance.__dict__
+
+
+@receiver(post_init, sender=SchoolApplicant)
+def remember_applicant_fields(sender, instance, **kwargs):
+    instance._original_values = {field: _field_value(instance, field) for field in RENDERED_FIELDS}
+
+
+@receiver(post_save, sender=SchoolApplicant)
+def applicant_saved(sender, instance, created, **kwargs):
+    """Drop derivatives of replaced uploads, pre-scale new ones, bump the data version."""
+    original = getattr(instance, '_original_values', {})
+    changed = created
+    for field in RENDERED_FIELDS:
+        if field in instance.__dict__ and original.get(field) != _field_value(instance, field):
+            changed = True
+
+    for field in IMAGE_FIELDS:
+        if field not in instance.__dict__:
+            continue
+        old_name, new_name = original.get(field), _field_value(instance, field)
+        if old_name == new_name:
+            continue
+        for kind in FIELD_KINDS[field]:
+            delete_thumbnail(old_name, kind)
+        if new_name:
+            thumbnail_path(getattr(instance, field), field)
+
+    seat_moved = created or any(
+        field in instance.__dict__ and original.get(field) != _field_value(instance, field)
+        for field in SEAT_FIELDS
+    )
+    if seat_moved and (original.get('roll_number') or _has_roll(instance, _field_value(instance, 'roll_number'))):
+        _reseat_subcategories({original.get('subcategory_id'), instance.__dict__.get('subcategory_id')})
+
+    if changed:
+        DataVersion.bump('applicant')
+    remember_applicant_fields(sender, instance)
+
+
+@receiver(post_delete, sender=SchoolApplicant)
+def applicant_deleted(sender, instance, **kwargs):
+    for field in IMAGE_FIELDS:
+        for kind in FIELD_KINDS[field]:
+            delete_thumbnail(_field_value(instance, field), kind)
+    # Its seat went to NULL; close the gap by moving the later rolls up
+    if _has_roll(instance, _field_value(instance, 'roll_number')):
+        _reseat_subcategories({instance.__dict__.get('subcategory_id')})
+    DataVersion.bump('applicant')
+
+
+@receiver(post_save, sender=SeatPlan)
+@receiver(post_delete, sender=SeatPlan)
+def seatplan_changed(sender, **kwargs):
+    DataVersion.bump('seatplan')
+
+
+@receiver(post_init, sender=SubCategory)
+def remember_custom_id(sender, instance, **kwargs):
+    instance._original_custom_id = instance.__dict__.get('custom_id')
+
+
+@receiver(post_save, sender=SubCategory)
+def subcategory_saved(sender, instance, created, **kwargs):
+    # A new code can take over seats; the old one loses its applicants
+    if 'custom_id' in instance.__dict__ and instance.custom_id != instance._original_custom_id:
+        reseat_on_commit([instance._original_custom_id, instance.custom_id])
+        remember_custom_id(sender, instance)
+    DataVersion.bump('subcategory')
+
+
+@receiver(post_delete, sender=SubCategory)
+def subcategory_deleted(sender, instance, **kwargs):
+    # Its applicants were detached (SET_NULL), so its seats are now empty
+    reseat_on_commit([instance.custom_id])
+    DataVersion.bump('subcategory')
+
+
+@receiver(post_save, sender=PortalPost)
+@receiver(post_delete, sender=PortalPost)
+def post_changed(sender, **kwargs):
+    DataVersion.bump('post')
+
+
+@receiver(post_delete, sender=PdfCacheEntry)
+def delete_cached_file(sender, instance, **kwargs):
+    try:
+        os.remove(os.path.join(settings.PDF_CACHE_ROOT, instance.file))
+    except OSError:
+        pass
@@ -1,3 +1,615 @@
+import datetime
+import io
+import os
+import tempfile
+import tracemalloc
+from unittest import mock, skipIf
 
+from django.contrib.auth.models import User
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import connection, transaction
+from django.http import FileResponse
+from django.test import TestCase, override_settings, tag
+from django.test.utils import CaptureQueriesContext
+from openpyxl import Workbook
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import AccessToken
 
-# Create your tests here.
+from .admit_cards import admit_cards, render_admit_cards_pdf
+from .applicant_numbers import ApplicantNumberAllocator
+from .attendance import attendance_rooms, attendance_zip, render_attendance
+from .checks import pypdf_check
+from .jobs import enqueue_job
+from .models import (
+    ApplicationSubmitted, PdfCacheEntry, PortalPost, RollSequence, SchoolApplicant, SeatPlan, SubCategory,
+)
+from .pdf_cache import ATTENDANCE_VERSIONS, cache_key
+from .pdf_stream import PYPDF_PROBLEM, PdfReader
+from .rolls import generate_all_rolls, generate_rolls
+from .seating import assign_seats
+from .seatplan_import import REQUIRED_COLUMNS, apply_staged, import_seatplan_file, seatplan_diff, stage_file
+from .views import MyTokenObtainPairSerializer
+
+
+class PortalPostListingTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+
+    def make_posts(self, count, category='job'):
+        for n in range(count):
+            post = PortalPost.objects.create(title=f"Circular {n}", category=category, description="-")
+            SubCategory.objects.create(post=post, name="A")
+            SubCategory.objects.create(post=post, name="B")
+
+    def test_query_count_does_not_grow_with_posts(self):
+        # DataVersion (ETag) + one page of posts + their subcategories
+        self.make_posts(3)
+        with self.assertNumQueries(3):
+            self.client.get('/api/posts/')
+        self.make_posts(40)
+        with self.assertNumQueries(3):
+            response = self.client.get('/api/posts/')
+        self.assertEqual(len(response.data['results']), 20)
+        self.assertEqual(len(response.data['results'][0]['subcategories']), 2)
+
+    def test_cursor_pages_cover_every_post_once(self):
+        self.make_posts(25)
+        first = self.client.get('/api/posts/').data
+        second = self.client.get(first['next']).data
+        ids = [p['id'] for p in first['results'] + second['results']]
+        self.assertEqual(sorted(ids, reverse=True), ids)
+        self.assertEqual(len(set(ids)), 25)
+        self.assertIsNone(second['next'])
+
+    def test_category_filter(self):
+        self.make_posts(2, 'job')
+        self.make_posts(3, 'admission')
+        response = self.client.get('/api/posts/', {'category': 'admission'})
+        self.assertEqual({p['category'] for p in response.data['results']}, {'admission'})
+        self.assertEqual(len(response.data['results']), 3)
+        self.assertEqual(self.client.get('/api/posts/', {'category': 'other'}).status_code, 400)
+
+
+class AttendanceDateKeyTests(TestCase):
+    FILTERS = {'post_code': 'ABC', 'subcategory_id': '', 'center': ''}
+
+    def test_cache_key_changes_with_the_printed_date(self):
+        today = cache_key('attendance', self.FILTERS, ATTENDANCE_VERSIONS, date=datetime.date(2026, 3, 1))
+        tomorrow = cache_key('attendance', self.FILTERS, ATTENDANCE_VERSIONS, date=datetime.date(2026, 3, 2))
+        self.assertNotEqual(today, tomorrow)
+
+    def test_yesterdays_job_is_not_reused(self):
+        with mock.patch('portal.jobs.sheet_date', return_value=datetime.date(2026, 3, 1)):
+            first = enqueue_job('attendance', self.FILTERS)
+            self.assertEqual(enqueue_job('attendance', self.FILTERS), first)
+        with mock.patch('portal.jobs.sheet_date', return_value=datetime.date(2026, 3, 2)):
+            self.assertNotEqual(enqueue_job('attendance', self.FILTERS), first)
+
+
+class AdmitCardQueryTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user('candidate', 'candidate@example.com', 'pw')
+        make_seat_plan(1)
+        SchoolApplicant.objects.update(email=cls.user.email, is_submit=True)
+        cls.url = f'/api/admit-card/{SubCategory.objects.get(custom_id="SYN-1").pk}/'
+
+    def setUp(self):
+        self.client = APIClient()
+
+    def authorize(self, token):
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {token}')
+
+    def test_claims_token_reads_without_a_user_query(self):
+        # ETag (applicant row + DataVersion), then the applicant with its seat
+        self.authorize(MyTokenObtainPairSerializer.get_token(self.user).access_token)
+        with self.assertNumQueries(3):
+            response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['seat_plan']['roll'], "SYN00000")
+        # A revalidation only needs the ETag
+        with self.assertNumQueries(2):
+            response = self.client.get(self.url, HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(response.status_code, 304)
+
+    def test_token_without_claims_loads_the_user(self):
+        self.authorize(AccessToken.for_user(self.user))
+        with self.assertNumQueries(4):
+            self.assertEqual(self.client.get(self.url).status_code, 200)
+
+
+class AdmitCardListTests(TestCase):
+    url = '/api/admit-cards/'
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user('candidate', 'candidate@example.com', 'pw')
+        post = PortalPost.objects.create(title="Exam", category='job', description="-")
+        cls.teacher = SubCategory.objects.create(post=post, name="Teacher", custom_id="JOB-001")
+        cls.clerk = SubCategory.objects.create(post=post, name="Clerk", custom_id="JOB-002")
+        make_applicants(cls.teacher, 3, rolls=["JOB00001", "JOB00002", "JOB00003"])
+        make_applicants(cls.clerk, 2, rolls=["JOB00004"])
+        SchoolApplicant.objects.update(email=cls.user.email, is_submit=True)
+        # A draft of the user's and someone else's application stay out
+        SchoolApplicant.objects.filter(roll_number__isnull=True).update(is_submit=False)
+        SchoolApplicant.objects.filter(roll_number="JOB00003").update(email="someone@example.com")
+        for roll in ("JOB00001", "JOB00002", "JOB00004"):
+            SeatPlan.objects.create(post_code=roll[:3], post_name="-", exam_center="Center 0", building="Main",
+                                    floor="0", room_no=roll[-1], exam_date_time="2026-03-01 10:00", roll=roll)
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.credentials(
+            HTTP_AUTHORIZATION=f'Bearer {MyTokenObtainPairSerializer.get_token(self.user).access_token}')
+
+    def get(self, **params):
+        return self.client.get(self.url, params)
+
+    def test_query_count_does_not_grow_with_the_applications(self):
+        # ETag (applicant aggregate + DataVersion), then the cards with their seats
+        with self.assertNumQueries(3):
+            response = self.get()
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([card['roll_number'] for card in response.data], ["JOB00001", "JOB00002", "JOB00004"])
+        self.assertEqual([card['seat_plan']['room_no'] for card in response.data], ["1", "2", "4"])
+        self.assertEqual(response.data[2]['subcategory_name'], "Clerk")
+        with self.assertNumQueries(3):
+            self.assertEqual(len(self.get(subcategory_ids=self.clerk.pk).data), 1)
+
+    def test_only_submitted_applications_are_listed(self):
+        SchoolApplicant.objects.filter(roll_number="JOB00002").update(is_submit=False)
+        self.assertEqual([card['roll_number'] for card in self.get().data], ["JOB00001", "JOB00004"])
+
+    def test_subcategory_filter(self):
+        response = self.get(subcategory_ids=f"{self.clerk.pk}")
+        self.assertEqual([card['roll_number'] for card in response.data], ["JOB00004"])
+        response = self.get(subcategory_ids=f"{self.clerk.pk}, {self.teacher.pk},")
+        self.assertEqual(len(response.data), 3)
+
+    def test_bad_subcategory_ids_are_rejected(self):
+        response = self.get(subcategory_ids="1,two")
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('subcategory_ids', response.data['error'])
+
+
+class ApplicantNumberAllocatorTests(TestCase):
+    class Rollback(Exception):
+        pass
+
+    def allocator(self):
+        return ApplicantNumberAllocator(6, 'test', 50, sequence_name='test')
+
+    def test_rolled_back_numbers_are_not_handed_out_twice(self):
+        # Two processes sharing the counter; the first one's transaction fails
+        first, second = self.allocator(), self.allocator()
+        try:
+            with transaction.atomic():
+                first.next()
+                raise self.Rollback
+        except self.Rollback:
+            pass
+        numbers = [first.next() for _ in range(5)] + [second.next() for _ in range(5)]
+        self.assertEqual(len(set(numbers)), 10)
+
+
+class ApplicationLockTests(TestCase):
+    def setUp(self):
+        make_seat_plan(1)
+        self.applicant = SchoolApplicant.objects.get()
+
+    def test_drafts_can_be_edited_until_submitted(self):
+        self.applicant.student_name = "Edited"
+        self.applicant.save()
+        self.applicant.submit()
+        self.applicant.student_name = "Too late"
+        with self.assertRaises(ApplicationSubmitted):
+            self.applicant.save()
+        self.assertEqual(SchoolApplicant.objects.get().student_name, "Edited")
+        with self.assertRaises(ApplicationSubmitted):
+            self.applicant.submit()
+
+    def test_stale_copy_cannot_overwrite_a_submission(self):
+        # Loaded before another request submitted the application
+        stale = SchoolApplicant.objects.get()
+        self.applicant.submit()
+        stale.student_name = "Overwritten"
+        with self.assertRaises(ApplicationSubmitted):
+            stale.save()
+        row = SchoolApplicant.objects.get()
+        self.assertEqual((row.is_submit, row.student_name), (True, "Applicant 0"))
+
+    def test_submit_through_the_api_locks_the_application(self):
+        user = User.objects.create_user('Applicant 0', 'a0@example.com', 'pw')
+        SchoolApplicant.objects.update(email=user.email)
+        client = APIClient()
+        client.force_authenticate(user)
+        url = f'/api/update-application/{self.applicant.pk}/'
+        self.assertEqual(client.patch(url, {'contact': '1', 'is_submit': True}, format='json').status_code, 200)
+        self.assertEqual(client.patch(url, {'contact': '2'}, format='json').status_code, 403)
+        row = SchoolApplicant.objects.get()
+        self.assertEqual((row.is_submit, row.contact), (True, '1'))
+
+    def test_edit_is_one_conditional_update(self):
+        self.applicant.contact = "1"
+        with CaptureQueriesContext(connection) as queries:
+            self.applicant.save()
+        self.assertEqual(len(queries), 1)
+        sql = queries[0]['sql']
+        self.assertTrue(sql.startswith('UPDATE'))
+        self.assertIn('"is_submit"', sql.split('WHERE')[1])
+        self.assertEqual(SchoolApplicant.objects.get().contact, "1")
+
+    def test_partial_save_writes_only_the_named_fields(self):
+        stale = SchoolApplicant.objects.get()
+        SchoolApplicant.objects.update(contact="9")
+        stale.student_name = "Renamed"
+        stale.save(update_fields=['student_name'])
+        row = SchoolApplicant.objects.get()
+        self.assertEqual((row.student_name, row.contact), ("Renamed", "9"))
+
+
+def make_applicants(subcategory, count, rolls=()):
+    """`count` applicants of the subcategory; the first ones get `rolls`."""
+    rolls = list(rolls) + [None] * (count - len(rolls))
+    first = SchoolApplicant.objects.count()
+    SchoolApplicant.objects.bulk_create([
+        SchoolApplicant(
+            applicant_number=f"A{first + n:07d}", roll_number=roll, subcategory=subcategory,
+            student_name=f"Applicant {n}", dob=datetime.date(2010, 1, 1), gender='Male',
+            student_class='6', father_name="F", mother_name="M", contact="0",
+        )
+        for n, roll in enumerate(rolls)
+    ])
+
+
+class RollGenerationTests(TestCase):
+    def setUp(self):
+        post = PortalPost.objects.create(title="Exam", category='job', description="-")
+        self.first = SubCategory.objects.create(post=post, name="Teacher", custom_id="JOB-001")
+        self.second = SubCategory.objects.create(post=post, name="Clerk", custom_id="JOB-002")
+
+    def rolls(self, subcategory):
+        return list(SchoolApplicant.objects.filter(subcategory=subcategory)
+                    .order_by('id').values_list('roll_number', flat=True))
+
+    def test_subcategories_sharing_a_prefix_share_one_sequence(self):
+        make_applicants(self.first, 2)
+        make_applicants(self.second, 2)
+        generate_rolls(self.first, reseat=False)
+        generate_rolls(self.second, reseat=False)
+        self.assertEqual(self.rolls(self.first), ["JOB00001", "JOB00002"])
+        self.assertEqual(self.rolls(self.second), ["JOB00003", "JOB00004"])
+        self.assertEqual(list(RollSequence.objects.values_list('prefix', 'last_value')), [("JOB", 4)])
+
+    def test_sequence_is_seeded_from_every_subcategory_with_the_prefix(self):
+        make_applicants(self.first, 1, rolls=["JOB00007"])
+        make_applicants(self.second, 1)
+        generate_all_rolls()
+        self.assertEqual(self.rolls(self.second), ["JOB00008"])
+
+
+class RollAssignmentTests(TestCase):
+    # Runs the set-based UPDATE; RollAssignmentBulkTests the bulk_update fallback
+    set_update = True
+
+    def setUp(self):
+        patcher = mock.patch('portal.rolls._supports_set_update', return_value=self.set_update)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        post = PortalPost.objects.create(title="Exam", category='job', description="-")
+        self.subcategory = SubCategory.objects.create(post=post, name="Teacher", custom_id="JOB-001")
+
+    def rolls(self):
+        return list(SchoolApplicant.objects.filter(subcategory=self.subcategory)
+                    .order_by('id').values_list('roll_number', flat=True))
+
+    def test_rolls_continue_after_the_highest_suffix_in_id_order(self):
+        make_applicants(self.subcategory, 1, rolls=["JOB00041"])
+        make_applicants(self.subcategory, 3)
+        result = generate_rolls(self.subcategory, reseat=False)
+        self.assertEqual((result.assigned, result.skipped), (3, 0))
+        self.assertEqual(self.rolls(), ["JOB00041", "JOB00042", "JOB00043", "JOB00044"])
+        # A second run has nothing left to number
+        self.assertEqual(generate_rolls(self.subcategory, reseat=False).assigned, 0)
+
+    def test_rolls_stop_at_the_largest_suffix(self):
+        make_applicants(self.subcategory, 1, rolls=["JOB99998"])
+        make_applicants(self.subcategory, 3)
+        [outcome] = generate_all_rolls()
+        self.assertEqual((outcome.result.assigned, outcome.result.skipped), (1, 2))
+        self.assertEqual(outcome.error, "Reached maximum rolls (100000) for prefix JOB.")
+        self.assertEqual(self.rolls(), ["JOB99998", "JOB99999", None, None])
+        self.assertEqual(RollSequence.objects.get(prefix="JOB").last_value, 99999)
+
+
+class RollAssignmentBulkTests(RollAssignmentTests):
+    set_update = False
+
+
+def make_seat_plan(seats, per_room=40):
+    """A synthetic seat plan of `seats` seats, each with a rolled applicant."""
+    post = PortalPost.objects.create(title="Exam", category='job', description="-")
+    subcategory = SubCategory.objects.create(post=post, name="Teacher", custom_id="SYN-1")
+    SchoolApplicant.objects.bulk_create([
+        SchoolApplicant(
+            applicant_number=f"T{n:07d}", roll_number=f"SYN{n:05d}", subcategory=subcategory,
+            student_name=f"Applicant {n}", dob=datetime.date(2010, 1, 1), gender='Male',
+            student_class='6', father_name="F", mother_name="M", contact="0",
+        )
+        for n in range(seats)
+    ], batch_size=2000)
+    applicant_ids = SchoolApplicant.objects.order_by('roll_number').values_list('id', flat=True)
+    SeatPlan.objects.bulk_create([
+        SeatPlan(
+            post_code="SYN-1", post_name="Teacher", exam_center=f"Center {n // (per_room * 50)}",
+            building="Main", floor=str(n // (per_room * 10) % 5), room_no=str(n // per_room),
+            exam_date_time="2026-03-01 10:00", roll=f"SYN{n:05d}", applicant_id=applicant_id,
+        )
+        for n, applicant_id in enumerate(applicant_ids)
+    ], batch_size=2000)
+
+
+class SeatAssignmentTests(TestCase):
+    def setUp(self):
+        make_seat_plan(3)
+        self.subcategory = SubCategory.objects.get(custom_id="SYN-1")
+
+    def seated(self):
+        return list(SeatPlan.objects.filter(post_code="SYN-1").order_by('room_no', 'id')
+                    .values_list('applicant__roll_number', flat=True))
+
+    def test_recompute_is_limited_to_the_given_post_codes(self):
+        other = SubCategory.objects.create(post=self.subcategory.post, name="Clerk", custom_id="OTH-1")
+        make_applicants(other, 1, rolls=["OTH00001"])
+        SeatPlan.objects.create(post_code="oth-1 ", post_name="Clerk", exam_center="Center 0", building="Main",
+                                floor="0", room_no="9", exam_date_time="2026-03-01 10:00", roll="OTH00001")
+        assign_seats(["SYN-1"])
+        self.assertFalse(SeatPlan.objects.filter(post_code="oth-1 ", applicant__isnull=False).exists())
+        assign_seats(["OTH-1"])
+        self.assertTrue(SeatPlan.objects.filter(post_code="oth-1 ", applicant__isnull=False).exists())
+
+    def test_roll_edit_reseats_its_post_code(self):
+        applicant = SchoolApplicant.objects.get(roll_number="SYN00000")
+        applicant.roll_number = "SYN00009"
+        with self.captureOnCommitCallbacks(execute=True):
+            applicant.save()
+        self.assertEqual(self.seated(), ["SYN00001", "SYN00002", "SYN00009"])
+
+    def test_deleted_applicant_leaves_no_hole(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            SchoolApplicant.objects.get(roll_number="SYN00000").delete()
+        self.assertEqual(self.seated(), ["SYN00001", "SYN00002", None])
+
+    def test_edits_without_a_seat_change_do_not_reseat(self):
+        applicant = SchoolApplicant.objects.get(roll_number="SYN00000")
+        applicant.student_name = "Renamed"
+        with mock.patch('portal.seating.assign_seats') as reseat, self.captureOnCommitCallbacks(execute=True):
+            applicant.save()
+        reseat.assert_not_called()
+
+    def test_deleted_subcategory_empties_its_seats(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.subcategory.delete()
+        self.assertEqual(self.seated(), [None, None, None])
+
+    def test_bulk_deletes_reseat_once(self):
+        with mock.patch('portal.seating.assign_seats') as reseat, self.captureOnCommitCallbacks(execute=True):
+            SchoolApplicant.objects.filter(roll_number__lt="SYN00002").delete()
+        reseat.assert_called_once_with({"SYN-1"})
+
+
+class SeatPlanImportRowNumberTests(TestCase):
+    HEADER = REQUIRED_COLUMNS
+    SEAT = ["SYN-1", "Teacher", "Center 0", "Main", "0", "101", "", "2026-03-01 10:00"]
+    NO_CODE = [""] + SEAT[1:]
+
+    def assert_rejected_rows(self, uploaded, rows):
+        # Two rows a chunk, so the numbering has to carry across chunks
+        result = import_seatplan_file(uploaded, batch_size=2)
+        self.assertEqual(list(result.rejected['row']), rows)
+        self.assertEqual(result.inserted, 3)
+
+    def test_csv_rows_are_numbered_as_in_the_file(self):
+        lines = [self.HEADER, self.SEAT, self.SEAT, [], self.NO_CODE, self.SEAT, [], [], self.NO_CODE]
+        content = "\n".join(",".join(line) for line in lines) + "\n"
+        self.assert_rejected_rows(SimpleUploadedFile("plan.csv", content.encode()), [5, 9])
+
+    def test_xlsx_rows_are_numbered_as_in_the_sheet(self):
+        workbook = Workbook()
+        sheet = workbook.active
+        for row, values in {1: self.HEADER, 2: self.SEAT, 3: self.SEAT, 5: self.NO_CODE,
+                            6: self.SEAT, 9: self.NO_CODE}.items():
+            for col, value in enumerate(values, start=1):
+                sheet.cell(row=row, column=col, value=value or None)
+        out = io.BytesIO()
+        workbook.save(out)
+        self.assert_rejected_rows(SimpleUploadedFile("plan.xlsx", out.getvalue()), [5, 9])
+
+
+class SeatPlanReimportTests(TestCase):
+    def seat(self, post_code, room_no, roll):
+        return [post_code, "Teacher", "Center A", "Main", "1", room_no, roll, "2026-03-01 10:00"]
+
+    def setUp(self):
+        for row in (self.seat("JOB-001", "1", "JOB00001"), self.seat("JOB-001", "1", "JOB00002"),
+                    self.seat("JOB-001", "1", "JOB00003"), self.seat("JOB-002", "1", "JOB00009")):
+            SeatPlan.objects.create(**dict(zip(REQUIRED_COLUMNS, row)))
+        self.removed = SeatPlan.objects.get(roll="JOB00003")
+        # The corrected sheet for JOB-001: second roll fixed, third seat
+        # dropped, a seat added in room 2; JOB-002 is not in it
+        lines = [REQUIRED_COLUMNS, self.seat("JOB-001", "1", "JOB00001"), self.seat("JOB-001", "1", "JOB00005"),
+                 self.seat("JOB-001", "2", "JOB00004")]
+        content = "\n".join(",".join(line) for line in lines) + "\n"
+        self.batch = stage_file(SimpleUploadedFile("plan.csv", content.encode())).batch
+
+    def plan(self):
+        return list(SeatPlan.objects.order_by('post_code', 'room_no', 'roll').values_list('post_code', 'room_no', 'roll'))
+
+    def test_dry_run_counts_and_leaves_the_plan_alone(self):
+        before = self.plan()
+        diff = seatplan_diff(self.batch)
+        self.assertEqual(diff.inserts[['room_no', 'roll']].values.tolist(), [["2", "JOB00004"]])
+        self.assertEqual(diff.updates[['roll_old', 'roll']].values.tolist(), [["JOB00002", "JOB00005"]])
+        self.assertEqual(diff.deletes, [self.removed.pk])
+        self.assertEqual(diff.unchanged, 1)
+        self.assertEqual(diff.scopes, [{'post_code': "JOB-001", 'exam_center': "Center A",
+                                        'insert': 1, 'update': 1, 'delete': 1, 'unchanged': 1}])
+        self.assertEqual(self.plan(), before)
+
+    def test_apply_changes_only_the_uploaded_post_code(self):
+        untouched = SeatPlan.objects.get(post_code="JOB-002")
+        corrected = SeatPlan.objects.get(roll="JOB00002")
+        diff = apply_staged(self.batch)
+        self.assertEqual((len(diff.inserts), len(diff.updates), len(diff.deletes)), (1, 1, 1))
+        self.assertEqual(self.plan(), [("JOB-001", "1", "JOB00001"), ("JOB-001", "1", "JOB00005"),
+                                       ("JOB-001", "2", "JOB00004"), ("JOB-002", "1", "JOB00009")])
+        self.assertEqual(SeatPlan.objects.get(post_code="JOB-002").pk, untouched.pk)
+        # A corrected seat is updated in place
+        self.assertEqual(SeatPlan.objects.get(roll="JOB00005").pk, corrected.pk)
+        self.assertFalse(SeatPlan.objects.filter(pk=self.removed.pk).exists())
+        # The batch is gone once applied
+        self.assertIsNone(seatplan_diff(self.batch))
+        self.assertIsNone(apply_staged(self.batch))
+
+
+@skipIf(PdfReader is None, PYPDF_PROBLEM)
+class AdmitCardPdfTests(TestCase):
+    def render(self, subcategory_id, workers):
+        out = io.BytesIO()
+        with mock.patch('portal.admit_cards.CARDS_PER_CHUNK', 4):
+            count = render_admit_cards_pdf(admit_cards(subcategory_id), out, workers=workers)
+        return count, PdfReader(io.BytesIO(out.getvalue()), strict=True).pages
+
+    def test_chunks_are_joined_in_roll_order(self):
+        make_seat_plan(10)
+        subcategory = SubCategory.objects.get(custom_id="SYN-1")
+        for workers in (1, 2):
+            count, pages = self.render(subcategory.pk, workers)
+            self.assertEqual((count, len(pages)), (10, 10))
+            self.assertIn("SYN00000", pages[0].extract_text())
+            self.assertIn("SYN00009", pages[-1].extract_text())
+
+    def test_no_cards_still_gives_a_valid_pdf(self):
+        post = PortalPost.objects.create(title="Exam", category='job', description="-")
+        subcategory = SubCategory.objects.create(post=post, name="Empty")
+        count, pages = self.render(subcategory.pk, 1)
+        self.assertEqual((count, len(pages)), (0, 1))
+
+
+@skipIf(PdfReader is None, PYPDF_PROBLEM)
+class AttendanceStreamingTests(TestCase):
+    URL = '/api/attendance-sheet/generate/'
+    ROOMS = 3
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.staff = User.objects.create_superuser('staff', 'staff@example.com', None)
+        make_seat_plan(cls.ROOMS * 40)
+
+    def setUp(self):
+        self.client.force_login(self.staff)
+        cache_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(cache_dir.cleanup)
+        self.cache_root = cache_dir.name
+        override = override_settings(PDF_CACHE_ROOT=self.cache_root)
+        override.enable()
+        self.addCleanup(override.disable)
+
+    def test_miss_streams_room_by_room_and_fills_the_cache(self):
+        response = self.client.get(self.URL, {'all': '1'})
+        self.assertNotIsInstance(response, FileResponse)
+        self.assertIn('attachment', response['Content-Disposition'])
+        chunks = iter(response.streaming_content)
+        first = next(chunks)
+        self.assertTrue(first.startswith(b'%PDF'))
+        self.assertFalse(PdfCacheEntry.objects.exists())
+        body = first + b''.join(chunks)
+        response.close()
+        self.assertEqual(len(PdfReader(io.BytesIO(body), strict=True).pages), self.ROOMS * 5)
+        self.assertEqual(PdfCacheEntry.objects.count(), 1)
+
+        cached = self.client.get(self.URL, {'all': '1'})
+        self.assertIsInstance(cached, FileResponse)
+        self.assertEqual(b''.join(cached.streaming_content), body)
+        cached.close()
+
+    def test_abandoned_download_leaves_nothing_behind(self):
+        response = self.client.get(self.URL, {'all': '1'})
+        next(iter(response.streaming_content))
+        response.close()
+        self.assertFalse(PdfCacheEntry.objects.exists())
+        self.assertEqual(os.listdir(self.cache_root), [])
+
+
+class PypdfCheckTests(TestCase):
+    def test_warns_when_pdfs_cannot_be_streamed(self):
+        with mock.patch('portal.checks.PYPDF_PROBLEM', "pypdf is not installed"):
+            self.assertEqual([w.id for w in pypdf_check(None)], ['portal.W001'])
+        with mock.patch('portal.checks.PYPDF_PROBLEM', None):
+            self.assertEqual(pypdf_check(None), [])
+
+
+class DiscardingFile:
+    """A write-only file that keeps nothing but the number of bytes written."""
+    size = 0
+
+    def write(self, data):
+        self.size += len(data)
+
+
+@tag('slow')
+@skipIf(PdfReader is None, PYPDF_PROBLEM)
+class AttendanceMemoryTests(TestCase):
+    """
+    Peak Python memory of an attendance export must not grow with the seat
+    plan: over 20k seats it may use little more than over the first 2k.
+    Without pypdf the merged PDF is drawn on one canvas, which does grow.
+    """
+    SEATS, PER_ROOM = 20000, 40
+    FILTERS = {'post_code': 'SYN-1', 'subcategory_id': '', 'center': ''}
+    # Rooms holding the first 2k seats
+    EARLY_ROOMS = 2000 // PER_ROOM
+    MAX_GROWTH = 1.5
+
+    @classmethod
+    def setUpTestData(cls):
+        make_seat_plan(cls.SEATS, cls.PER_ROOM)
+
+    def traced_peaks(self, export):
+        """Peak traced memory over the first 2k seats, and over the rest."""
+        peaks = []
+
+        def rooms():
+            for n, room in enumerate(attendance_rooms(self.FILTERS)):
+                if n == self.EARLY_ROOMS:
+                    peaks.append(tracemalloc.get_traced_memory()[1])
+                    tracemalloc.reset_peak()
+                yield room
+
+        tracemalloc.start()
+        try:
+            export(rooms())
+            peaks.append(tracemalloc.get_traced_memory()[1])
+        finally:
+            tracemalloc.stop()
+        return peaks
+
+    def assertFlat(self, export):
+        early, rest = self.traced_peaks(export)
+        self.assertLess(rest, early * self.MAX_GROWTH,
+                        f"peak {early} B over the first 2k seats, {rest} B over the other 18k")
+
+    def test_merged_pdf(self):
+        out = DiscardingFile()
+        self.assertFlat(lambda rooms: render_attendance(rooms, out, workers=1))
+        self.assertGreater(out.size, 0)
+
+    def test_merged_pdf_with_workers(self):
+        out = DiscardingFile()
+        self.assertFlat(lambda rooms: render_attendance(rooms, out, workers=2))
+        self.assertGreater(out.size, 0)
+
+    def test_zip_with_workers(self):
+        out = DiscardingFile()
+        self.assertFlat(lambda rooms: [out.write(chunk) for chunk in attendance_zip(rooms, workers=2)])
+        self.assertGreater(out.size, 0)
@@ -0,0 +1,100 @@
+import hashlib
+import os
+
+from django.conf import settings
+from PIL import Image, ImageOps
+
+
+# Derivatives live next to the uploads so they are served/backed up the same way.
+THUMBNAIL_DIR = 'pdf_thumbs'
+
+# Bounding boxes in pixels: the attendance row draws images at most ~0.75in
+# high inside a ~1.8in wide cell, so 200 dpi keeps them crisp on print.
+THUMBNAIL_SIZES = {
+    'photo': (360, 150),
+    'signature': (360, 150),
+    # Admit cards print the photo in a 1.3 x 1.6in box
+    'admit_photo': (260, 320),
+}
+
+# Signatures are ink on paper, so a greyscale copy loses nothing and is a
+# third of the size.
+THUMBNAIL_MODES = {
+    'photo': 'RGB',
+    'signature': 'L',
+    'admit_photo': 'RGB',
+}
+
+# Derivative kinds made from each upload field
+FIELD_KINDS = {
+    'photo': ('photo', 'admit_photo'),
+    'signature': ('signature',),
+}
+
+
+def _source_path(name):
+    if not name:
+        return None
+    path = os.path.join(settings.MEDIA_ROOT, name)
+    return path if os.path.exists(path) else None
+
+
+def _thumbnail_name(name, kind):
+    """Relative (MEDIA_ROOT) path of the derivative for an uploaded file name."""
+    digest = hashlib.sha1(name.encode('utf-8')).hexdigest()[:16]
+    stem = os.path.splitext(os.path.basename(name))[0]
+    return os.path.join(THUMBNAIL_DIR, kind, f"{stem}_{digest}.jpg")
+
+
+def _render_thumbnail(source, target, kind):
+    with Image.open(source) as img:
+        img = ImageOps.exif_transpose(img)
+        img.thumbnail(THUMBNAIL_SIZES[kind])
+        if img.mode in ('RGBA', 'LA', 'P'):
+            # Flatten transparency onto white like the PDF page behind it
+            img = img.convert('RGBA')
+            background = Image.new('RGB', img.size, (255, 255, 255))
+            background.paste(img, mask=img.getchannel('A'))
+            img = background
+        img = img.convert(THUMBNAIL_MODES[kind])
+
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+        # Write to a temp name first so concurrent renders never read half a file
+        tmp = f"{target}.{os.getpid()}.tmp"
+        img.save(tmp, 'JPEG', quality=80, optimize=True)
+        os.replace(tmp, target)
+
+
+def thumbnail_path(file, kind):
+    """
+    Absolute path of a small, PDF-ready copy of an applicant photo/signature.
+    `file` is the ImageField value or its stored name.
+    The copy is created on first use and rebuilt when the upload is newer.
+    Falls back to the original file if it cannot be scaled, and returns None
+    when there is no usable image at all.
+    """
+    name = getattr(file, 'name', file)
+    source = _source_path(name)
+    if not source:
+        return None
+    target = os.path.join(settings.MEDIA_ROOT, _thumbnail_name(name, kind))
+    try:
+        if os.path.getmtime(target) >= os.path.getmtime(source):
+            return target
+    except OSError:
+        pass
+    try:
+        _render_thumbnail(source, target, kind)
+        return target
+    except Exception:
+        return source
+
+
+def delete_thumbnail(name, kind):
+    """Drop the cached derivative of an uploaded file name, if any."""
+    if not name:
+        return
+    try:
+        os.remove(os.path.join(settings.MEDIA_ROOT, _thumbnail_name(name, kind)))
+    except OSError:
+        pass
@@ -2,7 +2,6 @@ from django.urls import path, include
 from rest_framework.routers import DefaultRouter
 from rest_framework_simplejwt.views import TokenRefreshView  # Add this import
 from portal import views
-from django.shortcuts import render
 from .views import (
     SchoolApplicantCreateView,
     PortalPostViewSet,
@@ -42,13 +41,21 @@ urlpatterns = [
     path('update-application/<int:pk>/', update_user_application, name='update-application'),
 
      path('admit-card/<int:subcategory_id>/', generate_admit_card),
+    path('admit-cards/', views.admit_cards, name='admit-cards'),
     
     path("upload-seatplan/", views.upload_seatplan, name="upload_seatplan"),
-    path("upload-success/", lambda request: render(request, "portal/upload_success.html"), name="upload_success"),
+    path("upload-seatplan/review/<str:batch>/", views.review_seatplan, name="review_seatplan"),
+    path("upload-seatplan/jobs/<int:job_id>/", views.seatplan_import_progress, name="seatplan_import_progress"),
+    path("upload-success/", views.upload_success, name="upload_success"),
     path("admin-tools/generate-rolls/", generate_rolls_view, name="generate_rolls"),
 
     path('attendance-sheet/', attendance_sheet_options, name='attendance_options'),
     path('attendance-sheet/generate/', views.generate_attendance_from_seatplan, name='generate_room_attendance'),
+    path('attendance-sheet/jobs/', views.submit_attendance_job, name='submit_attendance_job'),
+    path('admin-tools/admit-cards/', views.admit_card_pack, name='admit_card_pack'),
+
+    path('jobs/<int:job_id>/', views.job_status, name='job_status'),
+    path('jobs/<int:job_id>/download/', views.job_download, name='job_download'),
 ]
 
 urlpatterns += static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)
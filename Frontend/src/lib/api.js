@@ -68,9 +68,15 @@ export const auth = {
 
 // Posts/Categories
 export const posts = {
-  getAll: async () => {
-    const response = await api.get("/posts/");
-    return response.data;
+  // One page of circulars, newest first: { results, next }. Pass the
+  // previous page's `next` cursor to continue; category is "admission" or "job".
+  getAll: async ({ category, cursor } = {}) => {
+    const response = await api.get("/posts/", { params: { category, cursor } });
+    const { results, next } = response.data;
+    return {
+      results,
+      next: next ? new URL(next).searchParams.get("cursor") : null,
+    };
   },
 
   getSubcategories: async (postId) => {
@@ -108,8 +114,12 @@ export const applications = {
 
 // Admit Cards
 export const admitCards = {
-  get: async (subcategoryId) => {
-    const response = await api.get(`/admit-card/${subcategoryId}/`);
+  // All submitted applications' cards (seat included); optionally only some subcategories
+  getAll: async (subcategoryIds = []) => {
+    const params = subcategoryIds.length
+      ? { subcategory_ids: subcategoryIds.join(",") }
+      : {};
+    const response = await api.get("/admit-cards/", { params });
     return response.data;
   },
 };
@@ -1,7 +1,7 @@
 import React, { useState, useEffect, useRef } from "react";
 import { useParams } from "react-router-dom";
 import { usePDF } from "react-to-pdf";
-import { admitCards, seatPlans, getAuthToken } from "../../lib/api";
+import { admitCards, getAuthToken } from "../../lib/api";
 
 function AdmitCard() {
   const { subCategoryId } = useParams();
@@ -26,23 +26,15 @@ function AdmitCard() {
 
   const fetchAdmitCardData = async () => {
     try {
-      // Fetch admit card data
-      const admitCardData = await admitCards.get(subCategoryId);
-      setAdmitData(admitCardData);
-
-      // After getting admit data, fetch seat plan data if roll number exists
-      if (admitCardData.roll_number) {
-        try {
-          const seatPlanResponse = await seatPlans.getByRoll(
-            admitCardData.roll_number
-          );
-          if (seatPlanResponse && seatPlanResponse.length > 0) {
-            setSeatPlanData(seatPlanResponse[0]); // Take the first matching seat plan
-          }
-        } catch (seatPlanErr) {
-          console.warn("No seat plan data found for this roll number");
-        }
+      // One request for the card and its seat plan; revalidated with an
+      // ETag, so a reload is answered with 304 when nothing changed
+      const [admitCardData] = await admitCards.getAll([subCategoryId]);
+      if (!admitCardData) {
+        setError("Admit card not found or unauthorized.");
+        return;
       }
+      setAdmitData(admitCardData);
+      setSeatPlanData(admitCardData.seat_plan);
     } catch (err) {
       console.error("Error fetching data:", err);
       setError("Admit card not found or unauthorized.");
@@ -4,7 +4,9 @@ import { posts } from "../../lib/api";
 
 const CategoryList = () => {
   const [postsList, setPostsList] = useState([]);
+  const [nextCursor, setNextCursor] = useState(null);
   const [loading, setLoading] = useState(true);
+  const [loadingMore, setLoadingMore] = useState(false);
   const [error, setError] = useState(null);
   const navigate = useNavigate();
 
@@ -12,7 +14,8 @@ const CategoryList = () => {
     const fetchPosts = async () => {
       try {
         const data = await posts.getAll();
-        setPostsList(data);
+        setPostsList(data.results);
+        setNextCursor(data.next);
       } catch (err) {
         console.error("Error fetching posts:", err);
         setError("Failed to load posts");
@@ -24,6 +27,20 @@ const CategoryList = () => {
     fetchPosts();
   }, []);
 
+  const loadMore = async () => {
+    setLoadingMore(true);
+    try {
+      const data = await posts.getAll({ cursor: nextCursor });
+      setPostsList((prev) => [...prev, ...data.results]);
+      setNextCursor(data.next);
+    } catch (err) {
+      console.error("Error fetching posts:", err);
+      setError("Failed to load posts");
+    } finally {
+      setLoadingMore(false);
+    }
+  };
+
   const handleViewSubcategories = (postId) => {
     navigate(`/login?categoryId=${postId}`); // Pass categoryId to login
   };
@@ -50,6 +67,15 @@ const CategoryList = () => {
           </button>
         </div>
       ))}
+      {nextCursor && (
+        <button
+          className="w-full border border-indigo-600 text-indigo-600 px-4 py-2 rounded hover:bg-indigo-50 transition-colors disabled:opacity-50"
+          onClick={loadMore}
+          disabled={loadingMore}
+        >
+          {loadingMore ? "Loading..." : "Load more"}
+        </button>
+      )}
     </div>
   );
 };